@@ -1,26 +1,143 @@
 """Flask REST API for breast cancer risk assessment."""
 
-import io
-from flask import Flask, request, jsonify, send_file
+import functools
+import hmac
+import os
+import tempfile
+import threading
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import base64
-from breast_cancer_model import BreastCancerParams, assess_breast_cancer_risk, validate_params
+from breast_cancer_model import PatientBatch, assess_breast_cancer_risk, validate_params
+from compression import init_compression, negotiate
+from explain import explain_batch
+from jobs import (
+    ACTIVE_STATUSES,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_RETENTION,
+    JobLimitExceeded,
+    JobQueue,
+    MemoryJobStore,
+    SQLiteJobStore,
+)
 from metrics import compute_metrics
+from model_spec import ModelSpec, get_spec, model_registry
 from plotting import plot_risk_score, plot_contributing_factors, plot_risk_timeline, fig_to_png_bytes
-import presets
+from profiling import init_profiling
+from preset_registry import PLOT_KINDS, StaticAsset, get_preset_registry, prepare_preset_registry
+from serialization import REQUIRED_FIELDS, assessment_to_dict, explanation_to_dict, params_from_dict
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend
+init_compression(app)  # gzip/brotli for JSON bodies over COMPRESS_MIN_SIZE
 
+IMMUTABLE_MAX_AGE = 31536000  # one year
+
+app.config["ADMIN_TOKEN"] = os.environ.get("ADMIN_TOKEN")
+# Without a token admin endpoints are disabled unless localhost access is opted into;
+# behind a reverse proxy every request comes from localhost
+app.config["ADMIN_ALLOW_LOCALHOST"] = os.environ.get("ADMIN_ALLOW_LOCALHOST", "").lower() in ("1", "true", "yes")
+app.config["JOBS_DIR"] = os.environ.get("JOBS_DIR", os.path.join(tempfile.gettempdir(), "breast_cancer_jobs"))
+app.config["JOBS_DB"] = os.environ.get("JOBS_DB")  # SQLite path; in-memory store if unset
+app.config["JOBS_WORKERS"] = int(os.environ.get("JOBS_WORKERS", 2))
+app.config["JOBS_MAX_ACTIVE_PER_CLIENT"] = int(os.environ.get("JOBS_MAX_ACTIVE_PER_CLIENT", 2))
+app.config["JOBS_RETENTION"] = float(os.environ.get("JOBS_RETENTION", DEFAULT_RETENTION))  # seconds
+app.config["PROFILING_ENABLED"] = os.environ.get("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+app.config["PROFILE_SAMPLE_RATE"] = float(os.environ.get("PROFILE_SAMPLE_RATE", 0.0))
+
+# Coefficients are hot-reloaded from this JSON file when it changes
+if os.environ.get("RISK_MODEL_SPEC"):
+    model_registry.watch_file(os.environ["RISK_MODEL_SPEC"])
+
+get_preset_registry()  # render preset assets at startup, not on the first request
+# ...and for each newly activated version in the background, serving the old ones meanwhile
+model_registry.add_listener(prepare_preset_registry)
+
+
+@app.before_request
+def reload_model_spec():
+    """Pick up edits to the model spec file (stat'ed at most once a second)."""
+    model_registry.maybe_reload()
+
+
+def is_admin_request() -> bool:
+    """Whether the current request carries the admin token.
+    
+    With no token configured, only localhost callers qualify, and only
+    when ``ADMIN_ALLOW_LOCALHOST`` is set.
+    """
+    token = app.config.get("ADMIN_TOKEN")
+    if token:
+        return hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token)
+    return bool(app.config.get("ADMIN_ALLOW_LOCALHOST")) and request.remote_addr in ("127.0.0.1", "::1")
+
+
+def require_admin(view):
+    """Restrict a view to admin callers (see ``is_admin_request``)."""
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        if not is_admin_request():
+            return jsonify({"error": "Forbidden"}), 403
+        return view(*args, **kwargs)
+    return wrapped
+
+
+# X-Profile from admin callers / sampled requests -> /api/admin/profiles
+init_profiling(app, authorize=is_admin_request)
+
+
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the app's batch job queue, creating it from config on first use."""
+    queue = app.extensions.get("job_queue")
+    if queue is not None:
+        return queue
+    with _job_queue_lock:
+        # Concurrent first requests must share one queue (and one job store)
+        queue = app.extensions.get("job_queue")
+        if queue is None:
+            store = SQLiteJobStore(app.config["JOBS_DB"]) if app.config["JOBS_DB"] else MemoryJobStore()
+            queue = app.extensions["job_queue"] = JobQueue(
+                store,
+                app.config["JOBS_DIR"],
+                workers=app.config["JOBS_WORKERS"],
+                max_active_per_client=app.config["JOBS_MAX_ACTIVE_PER_CLIENT"],
+                retention=app.config["JOBS_RETENTION"],
+            )
+    return queue
+
+
+def request_client_id() -> str:
+    """Identify the caller for per-client job limits."""
+    return request.headers.get("X-Client-Id") or request.remote_addr or "anonymous"
+
+
+def request_spec() -> ModelSpec:
+    """Model spec selected by the ``model`` query parameter (active by default)."""
+    return get_spec(request.args.get("model"))
+
+
+def send_static_asset(asset: StaticAsset, immutable: bool = False):
+    """Serve a precomputed asset with ETag revalidation and precompression."""
+    encoding = negotiate(request.headers.get("Accept-Encoding"), list(asset.encoded))
+    body, etag = asset.variant(encoding)
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=asset.mimetype)
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+    
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    if immutable:
+        response.headers["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        response.headers["Cache-Control"] = "public, no-cache"
+    return response
 
-def preset_options():
-    """Return available risk profile presets."""
-    return {
-        "low_risk": presets.low_risk_profile(),
-        "moderate_risk": presets.moderate_risk_profile(),
-        "high_risk": presets.high_risk_profile(),
-        "very_high_risk": presets.very_high_risk_profile(),
-    }
 
 @app.route("/", methods=["GET"])
 def root():
@@ -31,10 +148,16 @@ def root():
         "endpoints": {
             "health": "/api/health",
             "presets": "/api/presets",
+            "preset_assessment": "/api/presets/<name>/assessment",
+            "preset_plot": "/api/presets/<name>/plot/<kind>",
             "assess": "/api/assess",
+            "explain": "/api/explain",
             "plot_risk_score": "/api/plot/risk_score",
             "plot_factors": "/api/plot/factors",
-            "plot_timeline": "/api/plot/timeline"
+            "plot_timeline": "/api/plot/timeline",
+            "jobs": "/api/jobs",
+            "admin_model": "/api/admin/model",
+            "admin_profiles": "/api/admin/profiles"
         }
     })
     
@@ -47,21 +170,29 @@ def health_check():
 @app.route("/api/presets", methods=["GET"])
 def get_presets():
     """Get available risk profile presets."""
-    available_presets = preset_options()
-    preset_data = {}
-    for name, params in available_presets.items():
-        preset_data[name] = {
-            "age": params.age,
-            "bmi": params.bmi,
-            "family_history": params.family_history,
-            "breast_density": params.breast_density,
-            "menopausal_status": params.menopausal_status,
-            "hormone_use": params.hormone_use,
-            "previous_biopsies": params.previous_biopsies,
-            "first_menstruation_age": params.first_menstruation_age,
-            "first_pregnancy_age": params.first_pregnancy_age,
-        }
-    return jsonify({"presets": preset_data})
+    return send_static_asset(get_preset_registry().index)
+
+
+@app.route("/api/presets/<name>/assessment", methods=["GET"])
+def get_preset_assessment(name):
+    """Get the precomputed assessment for a preset."""
+    return _send_preset_asset(name, "assessment")
+
+
+@app.route("/api/presets/<name>/plot/<kind>", methods=["GET"])
+def get_preset_plot(name, kind):
+    """Get a precomputed chart for a preset as PNG."""
+    if kind not in PLOT_KINDS:
+        return jsonify({"error": f"Unknown plot kind: {kind}"}), 404
+    return _send_preset_asset(name, kind)
+
+
+def _send_preset_asset(name, kind):
+    asset = get_preset_registry().asset(name, kind)
+    if asset is None:
+        return jsonify({"error": f"Unknown preset asset: {name}/{kind}"}), 404
+    # Fingerprinted URLs (?v=<digest>) never change content, so cache forever
+    return send_static_asset(asset, immutable=request.args.get("v") == asset.digest)
 
 
 @app.route("/api/assess", methods=["POST"])
@@ -71,51 +202,31 @@ def assess_risk():
         data = request.json
         
         # Validate required fields
-        required_fields = [
-            "age", "bmi", "family_history", "breast_density",
-            "menopausal_status", "hormone_use", "previous_biopsies",
-            "first_menstruation_age"
-        ]
-        
-        for field in required_fields:
+        for field in REQUIRED_FIELDS:
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
         # Create parameters
-        params = BreastCancerParams(
-            age=float(data["age"]),
-            bmi=float(data["bmi"]),
-            family_history=bool(data["family_history"]),
-            breast_density=str(data["breast_density"]),
-            menopausal_status=str(data["menopausal_status"]),
-            hormone_use=bool(data["hormone_use"]),
-            previous_biopsies=int(data["previous_biopsies"]),
-            first_menstruation_age=float(data["first_menstruation_age"]),
-            first_pregnancy_age=float(data["first_pregnancy_age"]) if data.get("first_pregnancy_age") is not None else None,
-        )
+        params = params_from_dict(data)
         
         # Validate parameters
         validate_params(params)
         
         # Perform assessment
-        result = assess_breast_cancer_risk(params)
-        metrics = compute_metrics(result, params)
+        spec = request_spec()
+        result = assess_breast_cancer_risk(params, spec)
+        metrics = compute_metrics(result, params, spec)
         
         # Prepare response
-        response = {
-            "risk_score": round(result.risk_score, 2),
-            "risk_category": result.risk_category,
-            "contributing_factors": {
-                k: round(v, 2) for k, v in result.contributing_factors.items()
-            },
-            "recommendations": result.recommendations,
-            "metrics": {
-                "percentile_rank": round(metrics.percentile_rank, 2),
-                "screening_frequency_months": metrics.screening_frequency_months,
-                "urgency_score": round(metrics.urgency_score, 2),
-            },
-            "patient_age": params.age,
-        }
+        response = assessment_to_dict(result, metrics, params)
+        
+        # A/B: score the same patient under a second model version
+        compare_version = request.args.get("compare_model")
+        if compare_version is not None:
+            compare_spec = get_spec(compare_version)
+            compare_result = assess_breast_cancer_risk(params, compare_spec)
+            compare_metrics = compute_metrics(compare_result, params, compare_spec)
+            response["comparison"] = assessment_to_dict(compare_result, compare_metrics, params)
         
         return jsonify(response)
         
@@ -125,6 +236,35 @@ def assess_risk():
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
 
+@app.route("/api/explain", methods=["POST"])
+def explain_risk():
+    """Explain risk scores via per-factor counterfactuals and a reference baseline.
+    
+    Accepts a single patient object, or ``{"patients": [...]}`` for a batch.
+    """
+    try:
+        data = request.json
+        is_batch = "patients" in data
+        records = data["patients"] if is_batch else [data]
+        
+        for i, record in enumerate(records):
+            for field in REQUIRED_FIELDS:
+                if field not in record:
+                    prefix = f"patients[{i}]: " if is_batch else ""
+                    return jsonify({"error": f"{prefix}Missing required field: {field}"}), 400
+        
+        batch = PatientBatch.from_params([params_from_dict(record) for record in records])
+        explanations = explain_batch(batch, spec=request_spec())
+        results = [explanation_to_dict(explanations.row(i)) for i in range(len(explanations))]
+        
+        return jsonify({"explanations": results} if is_batch else results[0])
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
 @app.route("/api/plot/risk_score", methods=["POST"])
 def get_risk_score_plot():
     """Generate and return risk score visualization as PNG."""
@@ -132,28 +272,18 @@ def get_risk_score_plot():
         data = request.json
         
         # Perform assessment (reuse assess_risk logic)
-        params = BreastCancerParams(
-            age=float(data["age"]),
-            bmi=float(data["bmi"]),
-            family_history=bool(data["family_history"]),
-            breast_density=str(data["breast_density"]),
-            menopausal_status=str(data["menopausal_status"]),
-            hormone_use=bool(data["hormone_use"]),
-            previous_biopsies=int(data["previous_biopsies"]),
-            first_menstruation_age=float(data["first_menstruation_age"]),
-            first_pregnancy_age=float(data["first_pregnancy_age"]) if data.get("first_pregnancy_age") is not None else None,
-        )
+        params = params_from_dict(data)
         
-        result = assess_breast_cancer_risk(params)
-        fig = plot_risk_score(result)
+        spec = request_spec()
+        result = assess_breast_cancer_risk(params, spec)
+        fig = plot_risk_score(result, spec)
         png_bytes = fig_to_png_bytes(fig)
         
-        return send_file(
-            io.BytesIO(png_bytes),
-            mimetype="image/png",
-            as_attachment=False
-        )
+        # PNG is already deflated; send the bytes as-is with Content-Length set
+        return Response(png_bytes, mimetype="image/png")
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -164,28 +294,17 @@ def get_factors_plot():
     try:
         data = request.json
         
-        params = BreastCancerParams(
-            age=float(data["age"]),
-            bmi=float(data["bmi"]),
-            family_history=bool(data["family_history"]),
-            breast_density=str(data["breast_density"]),
-            menopausal_status=str(data["menopausal_status"]),
-            hormone_use=bool(data["hormone_use"]),
-            previous_biopsies=int(data["previous_biopsies"]),
-            first_menstruation_age=float(data["first_menstruation_age"]),
-            first_pregnancy_age=float(data["first_pregnancy_age"]) if data.get("first_pregnancy_age") is not None else None,
-        )
+        params = params_from_dict(data)
         
-        result = assess_breast_cancer_risk(params)
+        result = assess_breast_cancer_risk(params, request_spec())
         fig = plot_contributing_factors(result)
         png_bytes = fig_to_png_bytes(fig)
         
-        return send_file(
-            io.BytesIO(png_bytes),
-            mimetype="image/png",
-            as_attachment=False
-        )
+        # PNG is already deflated; send the bytes as-is with Content-Length set
+        return Response(png_bytes, mimetype="image/png")
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -196,31 +315,209 @@ def get_timeline_plot():
     try:
         data = request.json
         
-        params = BreastCancerParams(
-            age=float(data["age"]),
-            bmi=float(data["bmi"]),
-            family_history=bool(data["family_history"]),
-            breast_density=str(data["breast_density"]),
-            menopausal_status=str(data["menopausal_status"]),
-            hormone_use=bool(data["hormone_use"]),
-            previous_biopsies=int(data["previous_biopsies"]),
-            first_menstruation_age=float(data["first_menstruation_age"]),
-            first_pregnancy_age=float(data["first_pregnancy_age"]) if data.get("first_pregnancy_age") is not None else None,
-        )
+        params = params_from_dict(data)
         
-        result = assess_breast_cancer_risk(params)
+        result = assess_breast_cancer_risk(params, request_spec())
         fig = plot_risk_timeline(params.age, result.risk_score)
         png_bytes = fig_to_png_bytes(fig)
         
-        return send_file(
-            io.BytesIO(png_bytes),
-            mimetype="image/png",
-            as_attachment=False
-        )
+        # PNG is already deflated; send the bytes as-is with Content-Length set
+        return Response(png_bytes, mimetype="image/png")
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/jobs", methods=["POST"])
+def submit_job():
+    """Submit a patient file (CSV or JSON lines) for asynchronous scoring.
+    
+    Send the file as multipart field ``file`` or as the raw request body.
+    JSON lines are detected from a ``.jsonl``/``.ndjson`` filename or an
+    ``application/x-ndjson`` body.
+    """
+    queue = get_job_queue()
+    client_id = request_client_id()
+    try:
+        # Refuse before the body (possibly millions of rows) is read
+        queue.check_limit(client_id)
+    except JobLimitExceeded as e:
+        return jsonify({"error": str(e)}), 429
+    
+    upload = request.files.get("file")
+    if upload is not None:
+        name = (upload.filename or "").lower()
+        input_format = "jsonl" if name.endswith((".jsonl", ".ndjson")) else "csv"
+    else:
+        input_format = "jsonl" if request.mimetype in ("application/x-ndjson", "application/jsonl") else "csv"
+    
+    fd, path = tempfile.mkstemp(dir=queue.spool_root, suffix=".upload")
+    try:
+        # Stream the upload to disk rather than holding it in memory
+        with os.fdopen(fd, "wb") as f:
+            if upload is not None:
+                upload.save(f)
+            else:
+                while block := request.stream.read(1 << 20):
+                    f.write(block)
+        job = queue.submit(
+            client_id,
+            path,
+            input_format,
+            spec=request_spec(),
+            chunk_size=int(request.args.get("chunk_size", DEFAULT_CHUNK_SIZE)),
+        )
+    except JobLimitExceeded as e:
+        return jsonify({"error": str(e)}), 429
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    
+    return jsonify(job.to_dict()), 202
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Get job status and progress."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/api/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    """Cancel a queued or running job, or delete a finished job and its results."""
+    queue = get_job_queue()
+    try:
+        job = queue.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if job.status in ACTIVE_STATUSES:
+            return jsonify(queue.cancel(job_id).to_dict())
+        queue.delete(job_id)
+        return "", 204
+    except KeyError:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+
+
+@app.route("/api/jobs/<job_id>/results", methods=["GET"])
+def get_job_results(job_id):
+    """Get results one page (spooled chunk) at a time, or all at once as CSV.
+    
+    ``?page=N`` returns JSON rows of chunk N; ``?format=csv`` streams every
+    chunk written so far as a single CSV document.
+    """
+    queue = get_job_queue()
+    job = queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    
+    if request.args.get("format") == "csv":
+        return Response(queue.iter_results_csv(job_id), mimetype="text/csv")
+    
+    try:
+        page = int(request.args.get("page", 0))
+        rows = queue.result_page(job_id, page)
+    except (IndexError, ValueError) as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify({
+        "page": page,
+        "pages": job.chunks,
+        "status": job.status,
+        "rows": rows.to_dict(orient="records"),
+    })
+
+
+@app.route("/api/admin/model", methods=["GET"])
+@require_admin
+def get_model_specs():
+    """List registered model versions and the active spec."""
+    return jsonify({
+        "active": model_registry.active.to_dict(),
+        "versions": model_registry.versions(),
+        "spec_file": model_registry.watched_path,
+    })
+
+
+@app.route("/api/admin/model", methods=["POST"])
+@require_admin
+def register_model_spec():
+    """Add a model spec version to the spec file; activate it with ``?activate=1``."""
+    if model_registry.watched_path is None:
+        return jsonify({"error": "Model changes require a spec file (RISK_MODEL_SPEC)."}), 409
+    try:
+        spec = ModelSpec.from_dict(request.json)
+        activate = spec.version if request.args.get("activate") == "1" else None
+        active = model_registry.publish(spec, activate=activate)
+        return jsonify({"registered": spec.version, "active": active.version})
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/api/admin/model/activate/<version>", methods=["POST"])
+@require_admin
+def activate_model_spec(version):
+    """Switch the active model version in the spec file (and so in every worker)."""
+    if model_registry.watched_path is None:
+        return jsonify({"error": "Model changes require a spec file (RISK_MODEL_SPEC)."}), 409
+    try:
+        return jsonify({"active": model_registry.publish(activate=version).version})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+
+
+@app.route("/api/admin/model/reload", methods=["POST"])
+@require_admin
+def reload_model_specs():
+    """Reload the model spec file immediately."""
+    try:
+        return jsonify({"active": model_registry.reload().version})
+    except (OSError, TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/api/admin/profiles", methods=["GET"])
+@require_admin
+def list_profiles():
+    """List the most recent request profiles, newest first."""
+    return jsonify({"profiles": [record.summary() for record in app.extensions["profiles"].list()]})
+
+
+@app.route("/api/admin/profiles/<profile_id>", methods=["GET"])
+@require_admin
+def get_profile(profile_id):
+    """Download a profile as folded stacks, a pstats dump or text.
+    
+    ``?format=`` defaults to ``folded`` for sampled profiles and ``pstats``
+    for cProfile ones.
+    """
+    record = app.extensions["profiles"].get(profile_id)
+    if record is None:
+        return jsonify({"error": f"Unknown profile: {profile_id}"}), 404
+    
+    fmt = request.args.get("format", "folded" if record.mode == "sample" else "pstats")
+    try:
+        if fmt == "folded":
+            return Response(record.to_folded(), mimetype="text/plain")
+        if fmt == "pstats":
+            return Response(
+                record.to_pstats(),
+                mimetype="application/octet-stream",
+                headers={"Content-Disposition": f"attachment; filename={profile_id}.prof"},
+            )
+        if fmt == "text":
+            return Response(record.to_text(), mimetype="text/plain")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"error": f"Unknown format: {fmt}"}), 400
+
+
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5000)
@@ -0,0 +1,139 @@
+"""Precomputed score bands holding every score-derived metric.
+
+The 0-100 score range is divided into bands of ``SCORE_RESOLUTION`` points.
+For each band the table stores the risk category, percentile rank and the
+screening interval for every age group, so deriving all of them from a
+score (or an array of scores) is a single index lookup.
+
+Model cut-offs lie on the band grid (``validate_spec`` enforces this), so
+these step functions are exact. The urgency score is continuous in the
+score and is computed directly rather than banded.
+"""
+
+import bisect
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+import numpy as np
+
+from model_spec import CATEGORY_NAMES, ModelSpec, get_spec
+
+
+SCORE_RESOLUTION = 0.01
+BANDS_PER_POINT = 100  # 1 / SCORE_RESOLUTION
+N_BANDS = 100 * BANDS_PER_POINT + 1  # band lower edges 0.00, 0.01, ..., 100.00
+
+# Lower edge of every band; k / 100 is the same double as the literal "k/100"
+BAND_EDGES = np.arange(N_BANDS) / BANDS_PER_POINT
+_EDGE_LIST = BAND_EDGES.tolist()
+
+
+@dataclass(frozen=True)
+class BandTable:
+    """Score-derived metrics for every band under one model version.
+
+    ``screening_months`` has one column per age group, split at
+    ``age_cutoffs`` (see ``age_groups``). Lookups for a single score use
+    Python lists built from the arrays, which are much cheaper per call
+    than NumPy scalar indexing.
+    """
+
+    model_version: str
+    categories: np.ndarray  # codes into CATEGORY_NAMES
+    percentile_ranks: np.ndarray
+    screening_months: np.ndarray  # shape (N_BANDS, len(age_cutoffs) + 1)
+    age_cutoffs: np.ndarray
+    _rows: list = field(init=False, repr=False, compare=False)
+    _age_cutoff_list: list = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Per band: (category name, percentile rank, screening months per age group)
+        rows = zip(
+            [CATEGORY_NAMES[code] for code in self.categories.tolist()],
+            self.percentile_ranks.tolist(),
+            [tuple(months) for months in self.screening_months.tolist()],
+        )
+        object.__setattr__(self, "_rows", list(rows))
+        object.__setattr__(self, "_age_cutoff_list", self.age_cutoffs.tolist())
+
+    def band_index(self, scores: Union[float, np.ndarray]) -> Union[int, np.ndarray]:
+        """Band of each score: the last band whose lower edge is <= the score.
+
+        ``floor(score * 100)`` can land one band off through rounding, so the
+        result is corrected against ``BAND_EDGES`` to match exactly the
+        comparisons a threshold ladder would make.
+        """
+        if np.ndim(scores) == 0:
+            return _scalar_band(float(scores))
+        values = np.clip(np.asarray(scores, dtype=np.float64), 0.0, 100.0)
+        index = np.clip(np.floor(values * BANDS_PER_POINT).astype(np.intp), 0, N_BANDS - 1)
+        index -= BAND_EDGES[index] > values
+        upper = np.minimum(index + 1, N_BANDS - 1)
+        index += (upper != index) & (BAND_EDGES[upper] <= values)
+        return index
+
+    def age_groups(self, ages: Union[float, np.ndarray]) -> Union[int, np.ndarray]:
+        """Screening-interval column for each age."""
+        if np.ndim(ages) == 0:
+            return bisect.bisect_right(self._age_cutoff_list, ages)
+        return np.searchsorted(self.age_cutoffs, ages, side="right")
+
+    def category(self, risk_score: float) -> str:
+        """Risk category name for a single score."""
+        return self._rows[_scalar_band(risk_score)][0]
+
+    def lookup(self, risk_score: float, age: float) -> tuple[str, float, int]:
+        """Category, percentile rank and screening interval for one patient."""
+        category, percentile_rank, months = self._rows[_scalar_band(risk_score)]
+        return category, percentile_rank, months[bisect.bisect_right(self._age_cutoff_list, age)]
+
+
+def _scalar_band(score: float) -> int:
+    """``BandTable.band_index`` for one score, in pure Python."""
+    value = min(max(score, 0.0), 100.0)
+    index = min(int(value * BANDS_PER_POINT), N_BANDS - 1)
+    if _EDGE_LIST[index] > value:
+        index -= 1
+    elif index + 1 < N_BANDS and _EDGE_LIST[index + 1] <= value:
+        index += 1
+    return index
+
+
+def build_band_table(spec: ModelSpec) -> BandTable:
+    """Evaluate every metric ladder of ``spec`` at each band's lower edge."""
+    categories = np.searchsorted(spec.category_cutoffs, BAND_EDGES, side="right").astype(np.int8)
+    percentile_ranks = np.asarray(spec.percentile_values, dtype=np.float64)[
+        np.searchsorted(spec.percentile_cutoffs, BAND_EDGES, side="right")
+    ]
+
+    # Low risk uses the age ladder; other categories have a fixed interval
+    category_months = np.array(
+        [0] + [spec.category_screening_months[name] for name in CATEGORY_NAMES[1:]]
+    )[categories]
+    low_months = np.asarray(spec.low_screening_months)
+    screening_months = np.where(
+        (categories == 0)[:, None], low_months[None, :], category_months[:, None]
+    )
+
+    for column in (categories, percentile_ranks, screening_months):
+        column.setflags(write=False)
+    return BandTable(
+        model_version=spec.version,
+        categories=categories,
+        percentile_ranks=percentile_ranks,
+        screening_months=screening_months,
+        age_cutoffs=np.asarray(spec.low_screening_age_cutoffs, dtype=np.float64),
+    )
+
+
+# Keyed by model version; a version's coefficients never change
+_tables: dict[str, BandTable] = {}
+
+
+def get_band_table(spec: Optional[ModelSpec] = None) -> BandTable:
+    """Return the band table for a spec (the active one by default), building it once."""
+    spec = spec or get_spec()
+    table = _tables.get(spec.version)
+    if table is None:
+        table = _tables[spec.version] = build_band_table(spec)
+    return table
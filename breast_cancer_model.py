@@ -7,6 +7,8 @@ characteristics and clinical features.
 from dataclasses import dataclass
 from typing import Optional
 import numpy as np
+from banding import get_band_table
+from model_spec import ModelSpec, get_spec
 
 
 @dataclass
@@ -46,6 +48,95 @@ class BreastCancerParams:
     first_pregnancy_age: Optional[float]
 
 
+DENSITY_LEVELS = ("low", "medium", "high", "very_high")
+MENOPAUSAL_STATUSES = ("premenopausal", "postmenopausal")
+
+# Column order of the factor matrix returned by ``risk_factor_matrix``; the
+# names match the keys of ``contributing_factors``.
+FACTOR_NAMES = (
+    "age",
+    "bmi",
+    "family_history",
+    "breast_density",
+    "hormone_use",
+    "previous_biopsies",
+    "early_menstruation",
+    "no_pregnancy",
+    "late_pregnancy",
+)
+
+
+def _category_codes(values: list[str], levels: tuple, name: str) -> np.ndarray:
+    """Encode category labels as integer codes into ``levels``."""
+    lookup = {level: code for code, level in enumerate(levels)}
+    try:
+        return np.array([lookup[v] for v in values], dtype=np.int8)
+    except KeyError:
+        raise ValueError(f"{name} must be one of {list(levels)}") from None
+
+
+@dataclass
+class PatientBatch:
+    """Columnar container of many patients' assessment parameters.
+
+    Each attribute is a 1-D array with one entry per patient. Categorical
+    fields are stored as integer codes into ``DENSITY_LEVELS`` and
+    ``MENOPAUSAL_STATUSES``; a missing first pregnancy is stored as NaN.
+    """
+    
+    age: np.ndarray
+    bmi: np.ndarray
+    family_history: np.ndarray
+    breast_density: np.ndarray
+    menopausal_status: np.ndarray
+    hormone_use: np.ndarray
+    previous_biopsies: np.ndarray
+    first_menstruation_age: np.ndarray
+    first_pregnancy_age: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.age)
+    
+    @classmethod
+    def from_params(cls, params_list: list[BreastCancerParams]) -> "PatientBatch":
+        """Build a batch from a list of BreastCancerParams."""
+        return cls(
+            age=np.array([p.age for p in params_list], dtype=np.float64),
+            bmi=np.array([p.bmi for p in params_list], dtype=np.float64),
+            family_history=np.array([p.family_history for p in params_list], dtype=bool),
+            breast_density=_category_codes(
+                [p.breast_density for p in params_list], DENSITY_LEVELS, "breast_density"
+            ),
+            menopausal_status=_category_codes(
+                [p.menopausal_status for p in params_list], MENOPAUSAL_STATUSES, "menopausal_status"
+            ),
+            hormone_use=np.array([p.hormone_use for p in params_list], dtype=bool),
+            previous_biopsies=np.array([p.previous_biopsies for p in params_list], dtype=np.int64),
+            first_menstruation_age=np.array(
+                [p.first_menstruation_age for p in params_list], dtype=np.float64
+            ),
+            first_pregnancy_age=np.array(
+                [np.nan if p.first_pregnancy_age is None else p.first_pregnancy_age for p in params_list],
+                dtype=np.float64,
+            ),
+        )
+    
+    def to_params(self, index: int) -> BreastCancerParams:
+        """Return the parameters of a single patient in the batch."""
+        pregnancy = self.first_pregnancy_age[index]
+        return BreastCancerParams(
+            age=float(self.age[index]),
+            bmi=float(self.bmi[index]),
+            family_history=bool(self.family_history[index]),
+            breast_density=DENSITY_LEVELS[self.breast_density[index]],
+            menopausal_status=MENOPAUSAL_STATUSES[self.menopausal_status[index]],
+            hormone_use=bool(self.hormone_use[index]),
+            previous_biopsies=int(self.previous_biopsies[index]),
+            first_menstruation_age=float(self.first_menstruation_age[index]),
+            first_pregnancy_age=None if np.isnan(pregnancy) else float(pregnancy),
+        )
+
+
 @dataclass
 class RiskAssessmentResult:
     """Holds outputs of the breast cancer risk assessment."""
@@ -54,6 +145,7 @@ class RiskAssessmentResult:
     risk_category: str  # "low", "moderate", "high", "very_high"
     contributing_factors: dict  # Factors contributing to risk
     recommendations: list[str]  # Clinical recommendations
+    model_version: Optional[str] = None  # ModelSpec version used for scoring
 
 
 def validate_params(params: BreastCancerParams) -> BreastCancerParams:
@@ -85,78 +177,77 @@ def validate_params(params: BreastCancerParams) -> BreastCancerParams:
     return params
 
 
-def calculate_risk_score(params: BreastCancerParams) -> tuple[float, dict]:
+def calculate_risk_score(
+    params: BreastCancerParams,
+    spec: Optional[ModelSpec] = None,
+) -> tuple[float, dict]:
     """Calculate breast cancer risk score based on patient parameters.
     
     This is a simplified risk model based on established risk factors.
+    Coefficients come from ``spec`` (the active model spec by default).
     Returns (risk_score, contributing_factors).
     """
     
     validated = validate_params(params)
-    base_risk = 12.5  # Base lifetime risk of ~12.5% for average woman
+    spec = spec or get_spec()
+    base_risk = spec.base_risk  # Base lifetime risk (~12.5% for average woman)
     
     contributing_factors = {}
     
     # Age factor (risk increases with age)
-    if validated.age >= 50:
-        age_factor = (validated.age - 50) * 0.5
+    if validated.age >= spec.age_threshold:
+        age_factor = (validated.age - spec.age_threshold) * spec.age_slope
         contributing_factors["age"] = age_factor
         base_risk += age_factor
     
     # BMI factor (higher BMI increases risk, especially postmenopausal)
     if validated.menopausal_status == "postmenopausal":
-        if validated.bmi > 25:
-            bmi_factor = (validated.bmi - 25) * 0.3
+        if validated.bmi > spec.bmi_threshold_post:
+            bmi_factor = (validated.bmi - spec.bmi_threshold_post) * spec.bmi_slope_post
             contributing_factors["bmi"] = bmi_factor
             base_risk += bmi_factor
-    elif validated.bmi > 30:
-        bmi_factor = (validated.bmi - 30) * 0.2
+    elif validated.bmi > spec.bmi_threshold_pre:
+        bmi_factor = (validated.bmi - spec.bmi_threshold_pre) * spec.bmi_slope_pre
         contributing_factors["bmi"] = bmi_factor
         base_risk += bmi_factor
     
     # Family history
     if validated.family_history:
-        family_factor = 15.0
+        family_factor = spec.family_history_factor
         contributing_factors["family_history"] = family_factor
         base_risk += family_factor
     
     # Breast density
-    density_factors = {
-        "low": 0.0,
-        "medium": 3.0,
-        "high": 8.0,
-        "very_high": 15.0
-    }
-    density_factor = density_factors.get(validated.breast_density, 0.0)
+    density_factor = spec.density_factors.get(validated.breast_density, 0.0)
     if density_factor > 0:
         contributing_factors["breast_density"] = density_factor
         base_risk += density_factor
     
     # Hormone use (increases risk)
     if validated.hormone_use:
-        hormone_factor = 8.0
+        hormone_factor = spec.hormone_factor
         contributing_factors["hormone_use"] = hormone_factor
         base_risk += hormone_factor
     
     # Previous biopsies (indicator of previous concerns)
     if validated.previous_biopsies > 0:
-        biopsy_factor = validated.previous_biopsies * 2.0
+        biopsy_factor = validated.previous_biopsies * spec.biopsy_factor
         contributing_factors["previous_biopsies"] = biopsy_factor
         base_risk += biopsy_factor
     
     # Early menstruation
-    if validated.first_menstruation_age < 12:
-        early_menstruation_factor = 5.0
+    if validated.first_menstruation_age < spec.early_menstruation_age:
+        early_menstruation_factor = spec.early_menstruation_factor
         contributing_factors["early_menstruation"] = early_menstruation_factor
         base_risk += early_menstruation_factor
     
     # Late or no pregnancy
     if validated.first_pregnancy_age is None:
-        no_pregnancy_factor = 5.0
+        no_pregnancy_factor = spec.no_pregnancy_factor
         contributing_factors["no_pregnancy"] = no_pregnancy_factor
         base_risk += no_pregnancy_factor
-    elif validated.first_pregnancy_age >= 30:
-        late_pregnancy_factor = 3.0
+    elif validated.first_pregnancy_age >= spec.late_pregnancy_age:
+        late_pregnancy_factor = spec.late_pregnancy_factor
         contributing_factors["late_pregnancy"] = late_pregnancy_factor
         base_risk += late_pregnancy_factor
     
@@ -166,13 +257,115 @@ def calculate_risk_score(params: BreastCancerParams) -> tuple[float, dict]:
     return risk_score, contributing_factors
 
 
-def assess_breast_cancer_risk(params: BreastCancerParams) -> RiskAssessmentResult:
+def validate_batch(batch: PatientBatch) -> PatientBatch:
+    """Vectorized counterpart of ``validate_params`` for a PatientBatch.
+    
+    Raises ValueError naming the first offending row.
+    """
+    
+    pregnancy = batch.first_pregnancy_age
+    has_pregnancy = ~np.isnan(pregnancy)
+    checks = [
+        # Range checks are negated so that NaN (e.g. a blank CSV cell) fails them
+        (~((batch.age > 0) & (batch.age <= 120)), "age must be between 0 and 120 years."),
+        (~((batch.bmi > 0) & (batch.bmi <= 60)), "bmi must be between 0 and 60 kg/m²."),
+        (batch.previous_biopsies < 0, "previous_biopsies must be non-negative."),
+        (
+            ~((batch.first_menstruation_age >= 8) & (batch.first_menstruation_age <= 20)),
+            "first_menstruation_age must be between 8 and 20 years.",
+        ),
+        (
+            has_pregnancy & ((pregnancy < batch.first_menstruation_age) | (pregnancy > 60)),
+            "first_pregnancy_age must be valid and reasonable.",
+        ),
+        (
+            (batch.breast_density < 0) | (batch.breast_density >= len(DENSITY_LEVELS)),
+            f"breast_density must be one of {list(DENSITY_LEVELS)}",
+        ),
+        (
+            (batch.menopausal_status < 0) | (batch.menopausal_status >= len(MENOPAUSAL_STATUSES)),
+            f"menopausal_status must be one of {list(MENOPAUSAL_STATUSES)}",
+        ),
+    ]
+    for invalid, message in checks:
+        if invalid.any():
+            row = int(np.argmax(invalid))
+            raise ValueError(f"row {row}: {message}")
+    
+    return batch
+
+
+def risk_factor_matrix(batch: PatientBatch, spec: Optional[ModelSpec] = None) -> np.ndarray:
+    """Compute every additive risk factor for a batch of patients.
+    
+    Vectorized counterpart of ``calculate_risk_score``. Returns an array of
+    shape ``(len(batch), len(FACTOR_NAMES))`` whose columns follow
+    ``FACTOR_NAMES``; factors that do not apply to a patient are zero.
+    """
+    
+    spec = spec or get_spec()
+    postmenopausal = batch.menopausal_status == MENOPAUSAL_STATUSES.index("postmenopausal")
+    pregnancy = batch.first_pregnancy_age
+    density_factors = np.array([spec.density_factors[level] for level in DENSITY_LEVELS])
+    
+    factors = np.zeros((len(batch), len(FACTOR_NAMES)))
+    factors[:, 0] = np.where(
+        batch.age >= spec.age_threshold, (batch.age - spec.age_threshold) * spec.age_slope, 0.0
+    )
+    factors[:, 1] = np.where(
+        postmenopausal,
+        np.where(
+            batch.bmi > spec.bmi_threshold_post, (batch.bmi - spec.bmi_threshold_post) * spec.bmi_slope_post, 0.0
+        ),
+        np.where(
+            batch.bmi > spec.bmi_threshold_pre, (batch.bmi - spec.bmi_threshold_pre) * spec.bmi_slope_pre, 0.0
+        ),
+    )
+    factors[:, 2] = np.where(batch.family_history, spec.family_history_factor, 0.0)
+    factors[:, 3] = np.maximum(density_factors[batch.breast_density], 0.0)
+    factors[:, 4] = np.where(batch.hormone_use, spec.hormone_factor, 0.0)
+    factors[:, 5] = np.maximum(batch.previous_biopsies, 0) * spec.biopsy_factor
+    factors[:, 6] = np.where(batch.first_menstruation_age < spec.early_menstruation_age, spec.early_menstruation_factor, 0.0)
+    factors[:, 7] = np.where(np.isnan(pregnancy), spec.no_pregnancy_factor, 0.0)
+    factors[:, 8] = np.where(pregnancy >= spec.late_pregnancy_age, spec.late_pregnancy_factor, 0.0)  # NaN compares False
+    return factors
+
+
+def raw_risk_scores(factors: np.ndarray, spec: Optional[ModelSpec] = None) -> np.ndarray:
+    """Unclamped scores from a factor matrix.
+    
+    Factors are accumulated onto the base risk in ``FACTOR_NAMES`` order,
+    the same order as ``calculate_risk_score``, so results are bit-identical
+    to the scalar path (matters for scores landing exactly on a cut-off).
+    """
+    
+    spec = spec or get_spec()
+    scores = np.full(len(factors), spec.base_risk)
+    for column in range(factors.shape[1]):
+        scores += factors[:, column]
+    return scores
+
+
+def calculate_risk_scores(batch: PatientBatch, spec: Optional[ModelSpec] = None) -> np.ndarray:
+    """Vectorized ``calculate_risk_score``: clamped risk scores for a batch."""
+    
+    validate_batch(batch)
+    spec = spec or get_spec()
+    return np.clip(raw_risk_scores(risk_factor_matrix(batch, spec), spec), 0.0, 100.0)
+
+
+def assess_breast_cancer_risk(
+    params: BreastCancerParams,
+    spec: Optional[ModelSpec] = None,
+) -> RiskAssessmentResult:
     """Perform comprehensive breast cancer risk assessment.
     
     Parameters
     ----------
     params : BreastCancerParams
         Patient parameters.
+    spec : Optional[ModelSpec]
+        Model coefficients; defaults to the active model spec.
     
     Returns
     -------
@@ -180,35 +373,30 @@ def assess_breast_cancer_risk(params: BreastCancerParams) -> RiskAssessmentResul
         Risk score, category, contributing factors, and recommendations.
     """
     
-    risk_score, contributing_factors = calculate_risk_score(params)
+    spec = spec or get_spec()
+    risk_score, contributing_factors = calculate_risk_score(params, spec)
     
     # Categorize risk
-    if risk_score < 15:
-        risk_category = "low"
-    elif risk_score < 25:
-        risk_category = "moderate"
-    elif risk_score < 40:
-        risk_category = "high"
-    else:
-        risk_category = "very_high"
+    risk_category = get_band_table(spec).category(risk_score)
+    low_cutoff, high_cutoff = spec.category_cutoffs[0], spec.category_cutoffs[1]
     
     # Generate recommendations
     recommendations = []
     
-    if risk_score >= 25:
+    if risk_score >= high_cutoff:
         recommendations.append("Schedule annual mammogram screening")
         recommendations.append("Consider genetic counseling if family history present")
     
-    if params.bmi > 25:
+    if params.bmi > spec.healthy_bmi_max:
         recommendations.append("Maintain healthy weight through diet and exercise")
     
-    if params.hormone_use and risk_score > 20:
+    if params.hormone_use and risk_score > spec.hormone_advice_score:
         recommendations.append("Discuss hormone therapy risks with your physician")
     
     if params.breast_density in ["high", "very_high"]:
         recommendations.append("Consider additional screening modalities (ultrasound, MRI)")
     
-    if risk_score < 15:
+    if risk_score < low_cutoff:
         recommendations.append("Continue regular self-examinations")
         recommendations.append("Follow standard screening guidelines for your age")
     
@@ -220,6 +408,7 @@ def assess_breast_cancer_risk(params: BreastCancerParams) -> RiskAssessmentResul
         risk_score=risk_score,
         risk_category=risk_category,
         contributing_factors=contributing_factors,
-        recommendations=recommendations
+        recommendations=recommendations,
+        model_version=spec.version,
     )
 
@@ -0,0 +1,123 @@
+"""Content-encoding helpers for API responses.
+
+Provides gzip (always available) and brotli (when the optional ``brotli``
+package is installed) encoders, plus ``Accept-Encoding`` negotiation.
+"""
+
+import gzip
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def available_encodings() -> list[str]:
+    """Return supported encodings in order of server preference."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def encode(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress ``data`` with the given content encoding."""
+    if encoding == "gzip":
+        # mtime=0 keeps the output deterministic so ETags are stable
+        return gzip.compress(data, compresslevel=GZIP_LEVEL if level is None else level, mtime=0)
+    if encoding == "br":
+        if brotli is None:
+            raise ValueError("brotli encoding is not available")
+        return brotli.compress(data, quality=BROTLI_QUALITY if level is None else level)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def parse_accept_encoding(header: Optional[str]) -> dict[str, float]:
+    """Parse an ``Accept-Encoding`` header into a ``{coding: q}`` mapping."""
+    accepted = {}
+    if not header:
+        return accepted
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def negotiate(header: Optional[str], offered: Optional[list[str]] = None) -> Optional[str]:
+    """Pick the best encoding from ``offered`` for an ``Accept-Encoding`` header.
+
+    Returns None when the identity encoding should be used.
+    """
+    accepted = parse_accept_encoding(header)
+    if not accepted:
+        return None
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in offered if offered is not None else available_encodings():
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+DEFAULT_CONFIG = {
+    "COMPRESS_MIN_SIZE": 500,  # bytes; smaller bodies are sent uncompressed
+    "COMPRESS_GZIP_LEVEL": GZIP_LEVEL,
+    "COMPRESS_BROTLI_QUALITY": BROTLI_QUALITY,
+    "COMPRESS_MIMETYPES": ["application/json"],
+}
+
+
+def init_compression(app) -> None:
+    """Register negotiated response compression on a Flask app.
+
+    Settings are read from ``app.config`` (see ``DEFAULT_CONFIG``) at
+    request time, so they can be overridden after registration.
+    """
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+
+    @app.after_request
+    def compress_response(response):
+        return _compress_response(app.config, response)
+
+
+def _compress_response(config, response):
+    from flask import request
+
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 304)
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in config["COMPRESS_MIMETYPES"]
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < config["COMPRESS_MIN_SIZE"]:
+        return response
+
+    encoding = negotiate(request.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+
+    level = config["COMPRESS_GZIP_LEVEL"] if encoding == "gzip" else config["COMPRESS_BROTLI_QUALITY"]
+    response.set_data(encode(body, encoding, level=level))
+    response.headers["Content-Encoding"] = encoding
+    return response
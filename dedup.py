@@ -0,0 +1,158 @@
+"""Deduplicating batch assessment.
+
+After the model's own thresholding many patients are indistinguishable:
+every premenopausal woman under 50 with BMI <= 30 and the same categorical
+answers gets the same score, factors and recommendations. This module
+reduces each row to its effective model key, runs the full
+``assess_breast_cancer_risk`` / ``compute_metrics`` path once per unique
+key, and scatters the results back to rows.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from banding import get_band_table
+from breast_cancer_model import (
+    DENSITY_LEVELS,
+    MENOPAUSAL_STATUSES,
+    PatientBatch,
+    RiskAssessmentResult,
+    assess_breast_cancer_risk,
+    risk_factor_matrix,
+    validate_batch,
+)
+from metrics import BatchRiskMetrics, RiskMetrics, compute_metrics
+from model_spec import CATEGORY_NAMES, ModelSpec, get_spec
+
+
+def effective_keys(batch: PatientBatch, spec: Optional[ModelSpec] = None) -> np.ndarray:
+    """Canonical per-row key of everything that influences an assessment.
+
+    Two rows with equal keys get identical ``RiskAssessmentResult`` and
+    ``RiskMetrics``. The key holds each factor's value and whether it is
+    present in ``contributing_factors`` (a factor can be present with value
+    0, e.g. age exactly at the threshold), the inputs used only by
+    recommendations, and the screening age group.
+
+    Returns an ``(n, k)`` float array.
+    """
+    spec = spec or get_spec()
+    postmenopausal = batch.menopausal_status == MENOPAUSAL_STATUSES.index("postmenopausal")
+    pregnancy = batch.first_pregnancy_age
+    density_factors = np.array([spec.density_factors[level] for level in DENSITY_LEVELS])
+
+    columns = [
+        # Presence of each entry in contributing_factors
+        batch.age >= spec.age_threshold,
+        np.where(postmenopausal, batch.bmi > spec.bmi_threshold_post, batch.bmi > spec.bmi_threshold_pre),
+        batch.family_history,
+        density_factors[batch.breast_density] > 0,
+        batch.hormone_use,
+        batch.previous_biopsies > 0,
+        batch.first_menstruation_age < spec.early_menstruation_age,
+        np.isnan(pregnancy),
+        pregnancy >= spec.late_pregnancy_age,
+        # Inputs used only by the recommendations
+        batch.bmi > spec.healthy_bmi_max,
+        batch.breast_density >= DENSITY_LEVELS.index("high"),
+        # Low-risk screening interval depends on the age group
+        get_band_table(spec).age_groups(batch.age),
+    ]
+    flags = np.column_stack([np.asarray(c, dtype=np.float64) for c in columns])
+    # + 0.0 folds -0.0 into 0.0 so equal values have equal bytes
+    return np.hstack([risk_factor_matrix(batch, spec), flags]) + 0.0
+
+
+@dataclass
+class DedupAssessment:
+    """Batch results computed once per unique effective key.
+
+    ``inverse[i]`` is the index into ``results``/``metrics`` for row ``i``.
+    Result objects are shared between rows with the same key.
+    """
+
+    results: list[RiskAssessmentResult]
+    metrics: list[RiskMetrics]
+    inverse: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.inverse)
+
+    @property
+    def n_unique(self) -> int:
+        return len(self.results)
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Rows per unique key (1.0 means no duplicates)."""
+        return len(self.inverse) / self.n_unique if self.n_unique else 1.0
+
+    def result(self, row: int) -> RiskAssessmentResult:
+        """Assessment for one row (shared; do not mutate)."""
+        return self.results[self.inverse[row]]
+
+    def row_metrics(self, row: int) -> RiskMetrics:
+        """Metrics for one row (shared; do not mutate)."""
+        return self.metrics[self.inverse[row]]
+
+    def batch_metrics(self) -> BatchRiskMetrics:
+        """Scatter the per-key metrics back to columnar per-row arrays."""
+        category_codes = {name: code for code, name in enumerate(CATEGORY_NAMES)}
+        return BatchRiskMetrics(
+            risk_scores=np.array([m.risk_score for m in self.metrics])[self.inverse],
+            risk_categories=np.array(
+                [category_codes[m.risk_category] for m in self.metrics], dtype=np.int8
+            )[self.inverse],
+            percentile_ranks=np.array([m.percentile_rank for m in self.metrics])[self.inverse],
+            screening_frequency_months=np.array(
+                [m.screening_frequency_months for m in self.metrics]
+            )[self.inverse],
+            urgency_scores=np.array([m.urgency_score for m in self.metrics])[self.inverse],
+        )
+
+    def stats(self) -> dict:
+        """Row and unique-key counts with the dedup ratio."""
+        return {
+            "rows": len(self.inverse),
+            "unique_profiles": self.n_unique,
+            "dedup_ratio": round(self.dedup_ratio, 2),
+        }
+
+
+def assess_batch_deduplicated(
+    batch: PatientBatch,
+    spec: Optional[ModelSpec] = None,
+) -> DedupAssessment:
+    """Assess a batch, scoring each unique effective profile only once.
+
+    Parameters
+    ----------
+    batch : PatientBatch
+        Patients to assess.
+    spec : Optional[ModelSpec]
+        Model coefficients; defaults to the active model spec.
+
+    Returns
+    -------
+    DedupAssessment
+        Per-key results plus the row-to-key mapping.
+    """
+
+    validate_batch(batch)
+    spec = spec or get_spec()
+    keys = np.ascontiguousarray(effective_keys(batch, spec))
+    # View each row as one opaque byte string so np.unique sorts a 1-D array
+    rows = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+    _, first_rows, inverse = np.unique(rows, return_index=True, return_inverse=True)
+
+    results = []
+    metrics = []
+    for row in first_rows:
+        params = batch.to_params(int(row))
+        result = assess_breast_cancer_risk(params, spec)
+        results.append(result)
+        metrics.append(compute_metrics(result, params, spec))
+
+    return DedupAssessment(results=results, metrics=metrics, inverse=inverse.ravel())
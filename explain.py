@@ -0,0 +1,141 @@
+"""Score explanations: counterfactual factor attributions and baseline deltas.
+
+The risk score is an additive sum of factors clamped to 0-100%, so the raw
+``contributing_factors`` stop describing the score once the clamp engages.
+Here each factor's attribution is the drop in the clamped score when that
+factor alone is removed, and every patient is also compared against a
+reference (average-risk) profile.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from breast_cancer_model import (
+    FACTOR_NAMES,
+    BreastCancerParams,
+    PatientBatch,
+    raw_risk_scores,
+    risk_factor_matrix,
+    validate_batch,
+)
+from model_spec import ModelSpec, get_spec
+import presets
+
+
+@dataclass
+class ScoreExplanation:
+    """Explanation of a single patient's risk score."""
+
+    risk_score: float  # clamped 0-100 score
+    raw_score: float  # additive score before clamping
+    attributions: dict  # risk_score minus the score with the factor removed
+    baseline_score: float  # reference profile's risk score
+    baseline_delta: float  # risk_score - baseline_score
+    factor_deltas: dict  # factor contribution minus the reference's
+
+
+@dataclass
+class BatchExplanation:
+    """Explanations for a batch, as arrays with one row per patient.
+
+    Two-dimensional arrays have one column per entry of ``FACTOR_NAMES``.
+    """
+
+    risk_scores: np.ndarray
+    raw_scores: np.ndarray
+    attributions: np.ndarray
+    baseline_score: float
+    baseline_deltas: np.ndarray
+    factor_deltas: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.risk_scores)
+
+    def row(self, index: int) -> ScoreExplanation:
+        """Return the explanation for one patient."""
+        return ScoreExplanation(
+            risk_score=float(self.risk_scores[index]),
+            raw_score=float(self.raw_scores[index]),
+            attributions=dict(zip(FACTOR_NAMES, self.attributions[index].tolist())),
+            baseline_score=self.baseline_score,
+            baseline_delta=float(self.baseline_deltas[index]),
+            factor_deltas=dict(zip(FACTOR_NAMES, self.factor_deltas[index].tolist())),
+        )
+
+
+def _clamp(scores: np.ndarray) -> np.ndarray:
+    return np.clip(scores, 0.0, 100.0)
+
+
+def _reference_components(reference: BreastCancerParams, spec: ModelSpec) -> tuple[np.ndarray, float]:
+    factors = risk_factor_matrix(validate_batch(PatientBatch.from_params([reference])), spec)[0]
+    return factors, float(_clamp(raw_risk_scores(factors[None, :], spec))[0])
+
+
+# Keyed by model version; a version's coefficients never change
+_reference_cache: dict[str, tuple[np.ndarray, float]] = {}
+
+
+def default_reference(spec: Optional[ModelSpec] = None) -> tuple[np.ndarray, float]:
+    """Cached ``(factor_vector, risk_score)`` of ``presets.reference_profile``."""
+    spec = spec or get_spec()
+    cached = _reference_cache.get(spec.version)
+    if cached is None:
+        cached = _reference_cache[spec.version] = _reference_components(presets.reference_profile(), spec)
+    return cached
+
+
+def explain_batch(
+    batch: PatientBatch,
+    reference: Optional[BreastCancerParams] = None,
+    spec: Optional[ModelSpec] = None,
+) -> BatchExplanation:
+    """Explain every patient in a batch in a single vectorized evaluation.
+
+    Parameters
+    ----------
+    batch : PatientBatch
+        Patients to explain.
+    reference : Optional[BreastCancerParams]
+        Baseline profile; defaults to the cached ``presets.reference_profile``.
+    spec : Optional[ModelSpec]
+        Model coefficients; defaults to the active model spec.
+
+    Returns
+    -------
+    BatchExplanation
+        Scores, counterfactual attributions and baseline-relative deltas.
+    """
+
+    validate_batch(batch)
+    spec = spec or get_spec()
+    if reference is None:
+        reference_factors, baseline_score = default_reference(spec)
+    else:
+        reference_factors, baseline_score = _reference_components(reference, spec)
+
+    factors = risk_factor_matrix(batch, spec)
+    raw_scores = raw_risk_scores(factors, spec)
+    risk_scores = _clamp(raw_scores)
+    # Score with each factor removed in turn: shape (n_patients, n_factors)
+    without = _clamp(raw_scores[:, None] - factors)
+
+    return BatchExplanation(
+        risk_scores=risk_scores,
+        raw_scores=raw_scores,
+        attributions=risk_scores[:, None] - without,
+        baseline_score=baseline_score,
+        baseline_deltas=risk_scores - baseline_score,
+        factor_deltas=factors - reference_factors,
+    )
+
+
+def explain(
+    params: BreastCancerParams,
+    reference: Optional[BreastCancerParams] = None,
+    spec: Optional[ModelSpec] = None,
+) -> ScoreExplanation:
+    """Explain a single patient's risk score. See ``explain_batch``."""
+    return explain_batch(PatientBatch.from_params([params]), reference, spec).row(0)
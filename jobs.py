@@ -0,0 +1,522 @@
+"""Asynchronous batch assessment jobs with on-disk result spooling.
+
+A patient file (CSV or JSON lines, one column/key per API field) is
+submitted as a job and scored in chunks by a local worker pool using the
+vectorized model. Each chunk's results are written to its own CSV file in
+the job's spool directory, so results can be paged while the job is still
+running and never have to fit in memory. Job state lives in a pluggable
+store: ``MemoryJobStore`` for a single process, or ``SQLiteJobStore`` to
+share state (including cancellation) between processes.
+
+Each ``JobQueue`` heartbeats into its store. Queued or running jobs whose
+queue has stopped heartbeating (a crash or restart) are marked failed, and
+finished jobs are deleted with their spooled results after ``retention``.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Iterator, Optional
+
+import pandas as pd
+
+from breast_cancer_model import calculate_risk_scores
+from metrics import compute_metrics_batch
+from model_spec import ModelSpec, get_spec
+from serialization import batch_from_frame, batch_metrics_to_frame
+
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+INPUT_FORMATS = ("csv", "jsonl")
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_RETENTION = 24 * 3600  # seconds a finished job's results are kept
+HEARTBEAT_INTERVAL = 10.0  # seconds
+ORPHAN_AFTER_HEARTBEATS = 3  # missed heartbeats before a queue's jobs are failed
+ORPHANED_ERROR = "Interrupted: the worker running this job stopped."
+
+
+class JobLimitExceeded(RuntimeError):
+    """Raised when a client already has the maximum number of active jobs."""
+
+
+@dataclass
+class Job:
+    """State of one batch assessment job."""
+
+    id: str
+    client_id: str
+    status: str
+    input_path: str
+    input_format: str  # one of INPUT_FORMATS
+    spool_dir: str
+    model_version: str
+    chunk_size: int
+    worker_id: Optional[str] = None  # JobQueue that owns (runs) the job
+    total_rows: Optional[int] = None  # known once the worker has scanned the input
+    rows_done: int = 0
+    chunks: int = 0  # result chunks spooled so far; also the number of pages
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def progress(self) -> Optional[float]:
+        """Fraction of rows scored, or None before the input is scanned."""
+        if self.status == SUCCEEDED:
+            return 1.0
+        if not self.total_rows:
+            return None
+        return self.rows_done / self.total_rows
+
+    def to_dict(self) -> dict:
+        """Public status view (no filesystem paths)."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "model_version": self.model_version,
+            "total_rows": self.total_rows,
+            "rows_done": self.rows_done,
+            "progress": self.progress,
+            "pages": self.chunks,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class MemoryJobStore:
+    """In-process job store."""
+
+    def __init__(self):
+        self._jobs: dict[str, Job] = {}
+        self._heartbeats: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: Job) -> Job:
+        with self._lock:
+            self._jobs[job.id] = Job(**asdict(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else Job(**asdict(job))
+
+    def update(self, job_id: str, expect: Optional[dict] = None, **changes) -> Optional[Job]:
+        """Apply changes; with ``expect``, only if those fields match (else None)."""
+        with self._lock:
+            job = self._jobs[job_id]
+            if expect and any(getattr(job, key) != value for key, value in expect.items()):
+                return None
+            for key, value in changes.items():
+                setattr(job, key, value)
+            job.updated_at = time.time()
+            return Job(**asdict(job))
+
+    def active_count(self, client_id: str) -> int:
+        with self._lock:
+            return sum(
+                1 for job in self._jobs.values()
+                if job.client_id == client_id and job.status in ACTIVE_STATUSES
+            )
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def heartbeat(self, worker_id: str) -> None:
+        with self._lock:
+            self._heartbeats[worker_id] = time.time()
+
+    def fail_orphans(self, live_since: float, error: str) -> list[str]:
+        """Fail active jobs whose worker has not heartbeated since ``live_since``."""
+        with self._lock:
+            failed = []
+            for job in self._jobs.values():
+                if job.status in ACTIVE_STATUSES and self._heartbeats.get(job.worker_id, 0.0) < live_since:
+                    job.status, job.error, job.updated_at = FAILED, error, time.time()
+                    failed.append(job.id)
+            return failed
+
+    def finished_before(self, cutoff: float) -> list[Job]:
+        """Finished jobs last updated before ``cutoff``."""
+        with self._lock:
+            return [
+                Job(**asdict(job)) for job in self._jobs.values()
+                if job.status in FINISHED_STATUSES and job.updated_at < cutoff
+            ]
+
+
+class SQLiteJobStore:
+    """Job store backed by a SQLite file, shareable between processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, client_id TEXT NOT NULL, status TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_client ON jobs (client_id, status)")
+            conn.execute("CREATE TABLE IF NOT EXISTS workers (id TEXT PRIMARY KEY, last_seen REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def create(self, job: Job) -> Job:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, client_id, status, data) VALUES (?, ?, ?, ?)",
+                (job.id, job.client_id, job.status, json.dumps(asdict(job))),
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else Job(**json.loads(row[0]))
+
+    def update(self, job_id: str, expect: Optional[dict] = None, **changes) -> Optional[Job]:
+        """Apply changes; with ``expect``, only if those fields match (else None)."""
+        with self._lock, self._connect() as conn:
+            # BEGIN IMMEDIATE serializes read-modify-write across processes
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise KeyError(job_id)
+            job = Job(**json.loads(row[0]))
+            if expect and any(getattr(job, key) != value for key, value in expect.items()):
+                return None
+            for key, value in changes.items():
+                setattr(job, key, value)
+            job.updated_at = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, data = ? WHERE id = ?",
+                (job.status, json.dumps(asdict(job)), job_id),
+            )
+        return job
+
+    def active_count(self, client_id: str) -> int:
+        with self._connect() as conn:
+            (count,) = conn.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE client_id = ? AND status IN ({_placeholders(ACTIVE_STATUSES)})",
+                (client_id, *ACTIVE_STATUSES),
+            ).fetchone()
+        return count
+
+    def delete(self, job_id: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def heartbeat(self, worker_id: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO workers (id, last_seen) VALUES (?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET last_seen = excluded.last_seen",
+                (worker_id, time.time()),
+            )
+
+    def fail_orphans(self, live_since: float, error: str) -> list[str]:
+        """Fail active jobs whose worker has not heartbeated since ``live_since``."""
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            live = {row[0] for row in conn.execute("SELECT id FROM workers WHERE last_seen >= ?", (live_since,))}
+            rows = conn.execute(
+                f"SELECT data FROM jobs WHERE status IN ({_placeholders(ACTIVE_STATUSES)})", ACTIVE_STATUSES
+            ).fetchall()
+            failed = []
+            for (data,) in rows:
+                job = Job(**json.loads(data))
+                if job.worker_id in live:
+                    continue
+                job.status, job.error, job.updated_at = FAILED, error, time.time()
+                conn.execute(
+                    "UPDATE jobs SET status = ?, data = ? WHERE id = ?",
+                    (job.status, json.dumps(asdict(job)), job.id),
+                )
+                failed.append(job.id)
+            conn.execute("DELETE FROM workers WHERE last_seen < ?", (live_since,))
+        return failed
+
+    def finished_before(self, cutoff: float) -> list[Job]:
+        """Finished jobs last updated before ``cutoff``."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT data FROM jobs WHERE status IN ({_placeholders(FINISHED_STATUSES)})", FINISHED_STATUSES
+            ).fetchall()
+        jobs = [Job(**json.loads(data)) for (data,) in rows]
+        return [job for job in jobs if job.updated_at < cutoff]
+
+
+def _placeholders(values) -> str:
+    return ",".join("?" * len(values))
+
+
+def _count_rows(path: str, input_format: str) -> int:
+    """Count data rows with a fast binary scan of the input file."""
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1  # final line without a trailing newline
+    return max(0, lines - 1) if input_format == "csv" else lines
+
+
+def _read_chunks(path: str, input_format: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    if input_format == "csv":
+        return pd.read_csv(path, chunksize=chunk_size)
+    return pd.read_json(path, lines=True, chunksize=chunk_size)
+
+
+class JobQueue:
+    """Local worker pool that runs batch assessment jobs.
+
+    Parameters
+    ----------
+    store : MemoryJobStore or SQLiteJobStore
+        Where job state is kept.
+    spool_root : str
+        Directory under which each job gets a directory for its input and
+        result chunks.
+    workers : int
+        Number of worker threads.
+    max_active_per_client : int
+        Maximum queued plus running jobs per client.
+    retention : Optional[float]
+        Seconds a finished job and its results are kept; None keeps them
+        until deleted.
+    heartbeat_interval : float
+        Seconds between heartbeats, orphan checks and retention sweeps.
+    """
+
+    def __init__(
+        self,
+        store,
+        spool_root: str,
+        workers: int = 2,
+        max_active_per_client: int = 2,
+        retention: Optional[float] = DEFAULT_RETENTION,
+        heartbeat_interval: float = HEARTBEAT_INTERVAL,
+    ):
+        self.store = store
+        self.spool_root = spool_root
+        self.max_active_per_client = max_active_per_client
+        self.retention = retention
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_id = uuid.uuid4().hex
+        self._submit_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="assess-job")
+        os.makedirs(spool_root, exist_ok=True)
+
+        # Fail jobs left behind by a crashed or restarted queue before accepting work
+        self.store.heartbeat(self.worker_id)
+        self.recover()
+        self._stop = threading.Event()
+        self._maintenance = threading.Thread(target=self._maintain, name="job-maintenance", daemon=True)
+        self._maintenance.start()
+
+    def submit(
+        self,
+        client_id: str,
+        input_path: str,
+        input_format: str = "csv",
+        spec: Optional[ModelSpec] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Job:
+        """Queue a patient file for scoring; the file is moved into the job's spool directory."""
+        if input_format not in INPUT_FORMATS:
+            raise ValueError(f"input_format must be one of {list(INPUT_FORMATS)}")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive.")
+        spec = spec or get_spec()
+
+        with self._submit_lock:
+            self.check_limit(client_id)
+            job_id = uuid.uuid4().hex
+            spool_dir = os.path.join(self.spool_root, job_id)
+            os.makedirs(spool_dir)
+            stored_input = os.path.join(spool_dir, f"input.{input_format}")
+            shutil.move(input_path, stored_input)
+            job = self.store.create(Job(
+                id=job_id,
+                client_id=client_id,
+                status=QUEUED,
+                input_path=stored_input,
+                input_format=input_format,
+                spool_dir=spool_dir,
+                model_version=spec.version,
+                chunk_size=chunk_size,
+                worker_id=self.worker_id,
+            ))
+
+        self._executor.submit(self._run, job_id)
+        return job
+
+    def check_limit(self, client_id: str) -> None:
+        """Raise JobLimitExceeded if the client cannot submit another job."""
+        if self.store.active_count(client_id) >= self.max_active_per_client:
+            raise JobLimitExceeded(f"Client already has {self.max_active_per_client} active jobs.")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job's current state, or None if unknown."""
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Job:
+        """Cancel a job: queued jobs stop immediately, running ones after the current chunk."""
+        job = self.store.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if job.status == QUEUED:
+            cancelled = self.store.update(
+                job_id, expect={"status": QUEUED}, status=CANCELLED, cancel_requested=True
+            )
+            if cancelled is not None:
+                return cancelled
+            job = self.store.get(job_id)  # a worker started it meanwhile
+        if job.status == RUNNING:
+            return self.store.update(job_id, cancel_requested=True)
+        return job
+
+    def delete(self, job_id: str) -> None:
+        """Delete a finished job's record and spooled results."""
+        job = self.store.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if job.status in ACTIVE_STATUSES:
+            raise ValueError("Job is still active; cancel it first.")
+        self.store.delete(job_id)
+        shutil.rmtree(job.spool_dir, ignore_errors=True)
+
+    def recover(self) -> list[str]:
+        """Mark jobs whose queue stopped heartbeating as failed; returns their ids."""
+        live_since = time.time() - ORPHAN_AFTER_HEARTBEATS * self.heartbeat_interval
+        failed = self.store.fail_orphans(live_since, ORPHANED_ERROR)
+        if failed:
+            logger.warning("Marked %d orphaned jobs as failed", len(failed))
+        return failed
+
+    def sweep(self) -> list[str]:
+        """Delete finished jobs older than ``retention``; returns their ids."""
+        if self.retention is None:
+            return []
+        expired = self.store.finished_before(time.time() - self.retention)
+        for job in expired:
+            self.delete(job.id)
+        return [job.id for job in expired]
+
+    def chunk_path(self, job: Job, index: int) -> str:
+        """Path of a job's ``index``-th result chunk."""
+        return os.path.join(job.spool_dir, f"results-{index:06d}.csv")
+
+    def result_page(self, job_id: str, page: int) -> pd.DataFrame:
+        """Return one spooled result chunk; available as soon as it is written."""
+        job = self.store.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if not 0 <= page < job.chunks:
+            raise IndexError(f"page must be between 0 and {job.chunks - 1}")
+        return pd.read_csv(self.chunk_path(job, page))
+
+    def iter_results_csv(self, job_id: str, block_size: int = 1 << 16) -> Iterator[bytes]:
+        """Stream all spooled chunks as one CSV document (single header row)."""
+        job = self.store.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        for index in range(job.chunks):
+            with open(self.chunk_path(job, index), "rb") as f:
+                if index > 0:
+                    f.readline()  # skip the repeated header
+                while block := f.read(block_size):
+                    yield block
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stop.set()
+        self._executor.shutdown(wait=wait)
+        self._maintenance.join()
+
+    def _maintain(self) -> None:
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.store.heartbeat(self.worker_id)
+                self.recover()
+                self.sweep()
+            except Exception:
+                logger.exception("Job queue maintenance failed")
+
+    def _run(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        if job is None:
+            return
+        try:
+            if job.status == QUEUED:  # else cancelled before a worker picked it up
+                self._score(job)
+        finally:
+            # Results are spooled; the input copy is no longer needed
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(job.input_path)
+
+    def _score(self, job: Job) -> None:
+        job_id = job.id
+        job = self.store.update(job_id, expect={"status": QUEUED}, status=RUNNING)
+        if job is None:
+            return  # cancelled since _run read it
+        running = {"status": RUNNING}
+
+        try:
+            spec = get_spec(job.model_version)
+            self.store.update(job_id, total_rows=_count_rows(job.input_path, job.input_format))
+
+            rows_done = 0
+            for index, frame in enumerate(_read_chunks(job.input_path, job.input_format, job.chunk_size)):
+                current = self.store.get(job_id)
+                if current.cancel_requested:
+                    self.store.update(job_id, expect=running, status=CANCELLED)
+                    return
+                if current.status != RUNNING:
+                    return  # failed as orphaned by another queue
+                try:
+                    batch = batch_from_frame(frame)
+                    scores = calculate_risk_scores(batch, spec)
+                except ValueError as e:
+                    raise ValueError(f"rows {rows_done}-{rows_done + len(frame) - 1}: {e}") from None
+                results = batch_metrics_to_frame(compute_metrics_batch(scores, batch.age, spec))
+                results.insert(0, "row", range(rows_done, rows_done + len(results)))
+
+                # Write then rename so readers never see a partial chunk
+                path = self.chunk_path(job, index)
+                results.to_csv(path + ".tmp", index=False)
+                os.replace(path + ".tmp", path)
+                rows_done += len(results)
+                self.store.update(job_id, rows_done=rows_done, chunks=index + 1)
+
+            # A cancel during the last chunk (or of an empty file) still wins
+            finished = self.store.update(
+                job_id, expect={**running, "cancel_requested": False}, status=SUCCEEDED, total_rows=rows_done
+            )
+            if finished is None:
+                self.store.update(job_id, expect=running, status=CANCELLED)
+        except Exception as e:
+            self.store.update(job_id, expect=running, status=FAILED, error=str(e))
@@ -0,0 +1,233 @@
+"""Offline load driver for the Flask API.
+
+Replays a weighted mix of assess, preset and plot traffic built from
+synthetic patients at a target request rate, then reports throughput and
+a latency histogram. Runs against the in-process Flask test client by
+default, or a local server with ``--url``.
+
+Example::
+
+    python loadtest.py --rate 50 --duration 10 --mix assess=0.7,preset=0.2,plot=0.1
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from preset_registry import PLOT_KINDS, PRESET_FACTORIES
+from serialization import params_to_dict
+from synthetic import generate_patients
+
+
+DEFAULT_MIX = {"assess": 0.7, "preset": 0.2, "plot": 0.1}
+
+# Latency histogram bucket upper bounds, in milliseconds
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class FlaskClientTransport:
+    """Send requests through Flask test clients (one per worker thread)."""
+
+    def __init__(self, app=None):
+        if app is None:
+            from app import app
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, payload: Optional[dict] = None) -> int:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=payload)
+        response.get_data()
+        return response.status_code
+
+
+class HttpTransport:
+    """Send requests to a running server over HTTP."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, payload: Optional[dict] = None) -> int:
+        data = None if payload is None else json.dumps(payload).encode("utf-8")
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+@dataclass
+class LoadTestReport:
+    """Outcome of a load test run."""
+
+    duration: float  # wall-clock seconds from first scheduled send to last completion
+    target_rate: float
+    kinds: list[str]  # traffic kind of each request
+    latencies: np.ndarray  # seconds, measured from each request's scheduled send time
+    statuses: np.ndarray
+    errors: int = field(init=False)
+
+    def __post_init__(self):
+        self.errors = int(((self.statuses < 200) | (self.statuses >= 400)).sum())
+
+    @property
+    def throughput(self) -> float:
+        """Completed requests per second."""
+        return len(self.latencies) / self.duration if self.duration > 0 else 0.0
+
+    def percentiles(self, qs=(50, 90, 99)) -> dict[int, float]:
+        """Latency percentiles in milliseconds."""
+        if len(self.latencies) == 0:
+            return {q: 0.0 for q in qs}
+        return {q: float(v) * 1000 for q, v in zip(qs, np.percentile(self.latencies, qs))}
+
+    def histogram(self) -> list[tuple[str, int]]:
+        """Return ``(bucket_label, count)`` pairs over ``HISTOGRAM_BOUNDS_MS``."""
+        bounds = np.array(HISTOGRAM_BOUNDS_MS, dtype=float)
+        counts = np.bincount(
+            np.searchsorted(bounds, self.latencies * 1000), minlength=len(bounds) + 1
+        )
+        labels = [f"<= {b:g} ms" for b in bounds] + [f"> {bounds[-1]:g} ms"]
+        return list(zip(labels, counts.tolist()))
+
+    def format(self) -> str:
+        """Render a human-readable summary."""
+        lines = [
+            f"requests:   {len(self.latencies)} ({self.errors} errors)",
+            f"target:     {self.target_rate:.1f} req/s",
+            f"throughput: {self.throughput:.1f} req/s over {self.duration:.2f} s",
+        ]
+        kinds, counts = np.unique(np.array(self.kinds), return_counts=True)
+        lines.append("mix:        " + ", ".join(f"{k}={c}" for k, c in zip(kinds, counts)))
+        lines.append("latency:    " + ", ".join(
+            f"p{q}={v:.1f} ms" for q, v in self.percentiles().items()
+        ))
+        histogram = self.histogram()
+        peak = max(count for _, count in histogram) or 1
+        for label, count in histogram:
+            lines.append(f"  {label:>12} {count:8d} {'#' * round(40 * count / peak)}")
+        return "\n".join(lines)
+
+
+def build_requests(total: int, mix: dict[str, float], seed: Optional[int] = None) -> list[tuple]:
+    """Build ``(kind, method, path, payload)`` tuples for a traffic mix."""
+    unknown = set(mix) - set(DEFAULT_MIX)
+    if unknown:
+        raise ValueError(f"Unknown traffic kinds: {sorted(unknown)}")
+
+    rng = np.random.default_rng(seed)
+    kinds = list(mix)
+    weights = np.array([mix[k] for k in kinds], dtype=float)
+    choices = rng.choice(len(kinds), size=total, p=weights / weights.sum())
+    patients = generate_patients(total, rng=rng)
+    preset_names = list(PRESET_FACTORIES)
+
+    requests = []
+    for i, choice in enumerate(choices):
+        kind = kinds[choice]
+        if kind == "assess":
+            requests.append((kind, "POST", "/api/assess", params_to_dict(patients.to_params(i))))
+        elif kind == "plot":
+            plot_kind = PLOT_KINDS[rng.integers(len(PLOT_KINDS))]
+            requests.append((kind, "POST", f"/api/plot/{plot_kind}", params_to_dict(patients.to_params(i))))
+        else:
+            name = preset_names[rng.integers(len(preset_names))]
+            path = "/api/presets" if rng.random() < 0.5 else f"/api/presets/{name}/assessment"
+            requests.append((kind, "GET", path, None))
+    return requests
+
+
+def run_load_test(
+    transport,
+    rate: float,
+    total: int,
+    mix: Optional[dict[str, float]] = None,
+    concurrency: int = 8,
+    seed: Optional[int] = None,
+) -> LoadTestReport:
+    """Replay ``total`` requests at ``rate`` requests/second (open loop).
+
+    Requests are dispatched on a fixed schedule regardless of how fast
+    earlier ones complete, and latency is measured from the scheduled send
+    time, so queueing delay under overload shows up in the percentiles.
+    """
+
+    requests = build_requests(total, mix or DEFAULT_MIX, seed)
+    latencies = np.zeros(total)
+    statuses = np.zeros(total, dtype=np.int64)
+
+    def send(i, scheduled):
+        _, method, path, payload = requests[i]
+        try:
+            statuses[i] = transport.request(method, path, payload)
+        except Exception:
+            statuses[i] = 0
+        latencies[i] = time.perf_counter() - scheduled
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, i, scheduled)
+    duration = time.perf_counter() - start
+
+    return LoadTestReport(
+        duration=duration,
+        target_rate=rate,
+        kinds=[r[0] for r in requests],
+        latencies=latencies,
+        statuses=statuses,
+    )
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """Parse ``"assess=0.7,preset=0.2,plot=0.1"`` into a weight mapping."""
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=20.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of traffic to schedule")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. assess=0.7,preset=0.2,plot=0.1")
+    parser.add_argument("--concurrency", type=int, default=8, help="worker threads")
+    parser.add_argument("--seed", type=int, default=0, help="seed for traffic and synthetic patients")
+    parser.add_argument("--url", help="base URL of a running server (default: in-process test client)")
+    args = parser.parse_args(argv)
+
+    transport = HttpTransport(args.url) if args.url else FlaskClientTransport()
+    report = run_load_test(
+        transport,
+        rate=args.rate,
+        total=max(1, int(args.rate * args.duration)),
+        mix=args.mix,
+        concurrency=args.concurrency,
+        seed=args.seed,
+    )
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
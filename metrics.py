@@ -1,7 +1,11 @@
 """Derived metrics for breast cancer risk assessments."""
 
 from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from banding import get_band_table
 from breast_cancer_model import BreastCancerParams, RiskAssessmentResult
+from model_spec import CATEGORY_NAMES, ModelSpec, get_spec, resolve_spec
 
 
 @dataclass
@@ -18,9 +22,30 @@ class RiskMetrics:
     urgency_score: float  # 0-1 score indicating urgency
 
 
+@dataclass
+class BatchRiskMetrics:
+    """Columnar risk metrics for a batch of patients.
+    
+    ``risk_categories`` holds integer codes into ``CATEGORY_NAMES``.
+    """
+    risk_scores: np.ndarray
+    risk_categories: np.ndarray
+    percentile_ranks: np.ndarray
+    screening_frequency_months: np.ndarray
+    urgency_scores: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.risk_scores)
+    
+    def category_names(self) -> np.ndarray:
+        """Return the risk categories as an array of names."""
+        return np.array(CATEGORY_NAMES)[self.risk_categories]
+
+
 def compute_metrics(
     result: RiskAssessmentResult,
     params: BreastCancerParams,
+    spec: Optional[ModelSpec] = None,
 ) -> RiskMetrics:
     """Compute additional metrics from a risk assessment.
     
@@ -30,6 +55,10 @@ def compute_metrics(
         The risk assessment result.
     params : BreastCancerParams
         Original patient parameters.
+    spec : Optional[ModelSpec]
+        Model thresholds; defaults to the registered spec that produced
+        ``result``. Required if that spec is not registered (e.g. it was
+        built with ``with_overrides``).
     
     Returns
     -------
@@ -37,37 +66,13 @@ def compute_metrics(
         Enhanced metrics including percentile rank and screening recommendations.
     """
     
-    # Estimate percentile rank based on risk score
-    # Using a simplified distribution model
-    if result.risk_score < 10:
-        percentile_rank = 20.0
-    elif result.risk_score < 15:
-        percentile_rank = 50.0
-    elif result.risk_score < 25:
-        percentile_rank = 75.0
-    elif result.risk_score < 40:
-        percentile_rank = 90.0
-    else:
-        percentile_rank = 98.0
-    
-    # Determine screening frequency
-    if result.risk_category == "very_high":
-        screening_frequency_months = 6
-    elif result.risk_category == "high":
-        screening_frequency_months = 12
-    elif result.risk_category == "moderate":
-        screening_frequency_months = 12
-    else:
-        # Low risk: standard screening based on age
-        if params.age < 40:
-            screening_frequency_months = 24  # Less frequent for younger women
-        elif params.age < 50:
-            screening_frequency_months = 18
-        else:
-            screening_frequency_months = 12
+    spec = resolve_spec(spec, result.model_version)
     
-    # Calculate urgency score (0-1)
-    urgency_score = min(1.0, result.risk_score / 50.0)
+    # Percentile rank and screening interval (by age group) are precomputed
+    # per 0.01-point score band; urgency is continuous, so computed directly
+    table = get_band_table(spec)
+    _, percentile_rank, screening_frequency_months = table.lookup(result.risk_score, params.age)
+    urgency_score = min(1.0, result.risk_score / spec.urgency_scale)
     
     return RiskMetrics(
         risk_score=result.risk_score,
@@ -76,3 +81,44 @@ def compute_metrics(
         screening_frequency_months=screening_frequency_months,
         urgency_score=urgency_score,
     )
+
+
+def compute_metrics_batch(
+    risk_scores: np.ndarray,
+    ages: np.ndarray,
+    spec: Optional[ModelSpec] = None,
+) -> BatchRiskMetrics:
+    """Vectorized ``compute_metrics`` over arrays of risk scores and ages.
+    
+    Parameters
+    ----------
+    risk_scores : np.ndarray
+        Clamped risk scores, e.g. from ``calculate_risk_scores``.
+    ages : np.ndarray
+        Patient ages, aligned with ``risk_scores``.
+    spec : Optional[ModelSpec]
+        Model thresholds; defaults to the active model spec.
+    
+    Returns
+    -------
+    BatchRiskMetrics
+        Categories, percentile ranks, screening intervals and urgency scores.
+    """
+    
+    spec = spec or get_spec()
+    risk_scores = np.asarray(risk_scores, dtype=np.float64)
+    
+    table = get_band_table(spec)
+    bands = table.band_index(risk_scores)
+    categories = table.categories[bands]
+    percentile_ranks = table.percentile_ranks[bands]
+    screening_frequency_months = table.screening_months[bands, table.age_groups(ages)]
+    urgency_scores = np.minimum(1.0, risk_scores / spec.urgency_scale)
+    
+    return BatchRiskMetrics(
+        risk_scores=risk_scores,
+        risk_categories=categories,
+        percentile_ranks=percentile_ranks,
+        screening_frequency_months=screening_frequency_months,
+        urgency_scores=urgency_scores,
+    )
@@ -0,0 +1,450 @@
+"""Versioned, validated model coefficients with atomic hot reload.
+
+Every coefficient and cut-off used by the risk model and derived metrics
+lives in a frozen ``ModelSpec``. Specs are registered by version in a
+``ModelRegistry``; the active spec is swapped atomically (a single
+reference assignment), and specs can be reloaded from a JSON file while
+workers keep serving.
+
+Spec file format (JSON), either a single spec object or::
+
+    {"active": "1.1.0", "models": [{"version": "1.1.0", ...}, ...]}
+
+Fields omitted from a spec object take the built-in defaults.
+
+A registry is local to its process. Changes that must reach every worker
+go through the watched file (``ModelRegistry.publish``), which each worker
+polls.
+"""
+
+import contextlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field, fields, replace
+from types import MappingProxyType
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; publish() then relies on os.replace alone
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DENSITY_KEYS = ("low", "medium", "high", "very_high")
+CATEGORY_NAMES = ("low", "moderate", "high", "very_high")
+MAPPING_FIELDS = ("density_factors", "category_screening_months")
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """Coefficients and thresholds for one version of the risk model.
+
+    Attributes
+    ----------
+    version : str
+        Unique version label. A version's contents never change once registered.
+    base_risk : float
+        Intercept: lifetime risk (%) of a woman with no risk factors.
+    age_threshold, age_slope : float
+        Age adds ``(age - age_threshold) * age_slope`` from the threshold on.
+    bmi_threshold_post, bmi_slope_post : float
+        Postmenopausal BMI above the threshold adds ``excess * slope``.
+    bmi_threshold_pre, bmi_slope_pre : float
+        Premenopausal BMI above the threshold adds ``excess * slope``.
+    density_factors : Mapping
+        Additive factor per breast density level.
+    family_history_factor, hormone_factor, biopsy_factor : float
+        Flat factors; the biopsy factor is per previous biopsy.
+    early_menstruation_age, early_menstruation_factor : float
+        Menarche before this age adds the factor.
+    no_pregnancy_factor : float
+        Added when there was no pregnancy.
+    late_pregnancy_age, late_pregnancy_factor : float
+        First pregnancy at or after this age adds the factor.
+    category_cutoffs : tuple
+        Lower score bounds of "moderate", "high" and "very_high".
+    hormone_advice_score : float
+        Score above which hormone users are advised to discuss therapy risks.
+    healthy_bmi_max : float
+        BMI above which weight advice is given.
+    percentile_cutoffs, percentile_values : tuple
+        Score ladder for the percentile rank; one more value than cut-offs.
+    category_screening_months : Mapping
+        Screening interval for the non-low categories.
+    low_screening_age_cutoffs, low_screening_months : tuple
+        Age ladder for the low-risk screening interval; one more value than cut-offs.
+    urgency_scale : float
+        Score at which the urgency score saturates at 1.
+    """
+
+    version: str
+    base_risk: float = 12.5
+    age_threshold: float = 50.0
+    age_slope: float = 0.5
+    bmi_threshold_post: float = 25.0
+    bmi_slope_post: float = 0.3
+    bmi_threshold_pre: float = 30.0
+    bmi_slope_pre: float = 0.2
+    density_factors: Mapping[str, float] = field(default_factory=lambda: {
+        "low": 0.0,
+        "medium": 3.0,
+        "high": 8.0,
+        "very_high": 15.0,
+    })
+    family_history_factor: float = 15.0
+    hormone_factor: float = 8.0
+    biopsy_factor: float = 2.0
+    early_menstruation_age: float = 12.0
+    early_menstruation_factor: float = 5.0
+    no_pregnancy_factor: float = 5.0
+    late_pregnancy_age: float = 30.0
+    late_pregnancy_factor: float = 3.0
+    category_cutoffs: tuple = (15.0, 25.0, 40.0)
+    hormone_advice_score: float = 20.0
+    healthy_bmi_max: float = 25.0
+    percentile_cutoffs: tuple = (10.0, 15.0, 25.0, 40.0)
+    percentile_values: tuple = (20.0, 50.0, 75.0, 90.0, 98.0)
+    category_screening_months: Mapping[str, int] = field(default_factory=lambda: {
+        "moderate": 12,
+        "high": 12,
+        "very_high": 6,
+    })
+    low_screening_age_cutoffs: tuple = (40.0, 50.0)
+    low_screening_months: tuple = (24, 18, 12)
+    urgency_scale: float = 50.0
+
+    def __post_init__(self):
+        # Read-only copies, so a registered version cannot be edited in place
+        for name in MAPPING_FIELDS:
+            value = getattr(self, name)
+            if not isinstance(value, Mapping):
+                raise ValueError(f"{name} must be a mapping.")
+            object.__setattr__(self, name, MappingProxyType(dict(value)))
+        validate_spec(self)
+
+    def to_dict(self) -> dict:
+        """Serialize to a JSON-compatible dict."""
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        for name in MAPPING_FIELDS:
+            data[name] = dict(data[name])
+        return {k: list(v) if isinstance(v, tuple) else v for k, v in data.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ModelSpec":
+        """Build a validated spec from a dict; omitted fields use defaults."""
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown model spec fields: {sorted(unknown)}")
+        if "version" not in data:
+            raise ValueError("Model spec must have a version.")
+        values = {k: tuple(v) if isinstance(v, list) else v for k, v in data.items()}
+        return cls(**values)
+
+
+LADDER_FIELDS = (
+    "category_cutoffs",
+    "percentile_cutoffs",
+    "percentile_values",
+    "low_screening_age_cutoffs",
+    "low_screening_months",
+)
+
+
+def _is_number(value) -> bool:
+    """A finite int or float; bools are rejected even though they are ints."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _is_increasing(values) -> bool:
+    return all(a < b for a, b in zip(values, values[1:]))
+
+
+def validate_spec(spec: ModelSpec) -> ModelSpec:
+    """Check a spec for internal consistency; raise ValueError otherwise."""
+
+    if not isinstance(spec.version, str) or not spec.version:
+        raise ValueError("version must be a non-empty string.")
+
+    for f in fields(spec):
+        value = getattr(spec, f.name)
+        if f.type is float and not _is_number(value):
+            raise ValueError(f"{f.name} must be a finite number.")
+    for name in LADDER_FIELDS:
+        value = getattr(spec, name)
+        if not isinstance(value, tuple) or not all(_is_number(v) for v in value):
+            raise ValueError(f"{name} must be a tuple of finite numbers.")
+
+    if set(spec.density_factors) != set(DENSITY_KEYS):
+        raise ValueError(f"density_factors must have exactly the keys {list(DENSITY_KEYS)}")
+    if not all(_is_number(v) for v in spec.density_factors.values()):
+        raise ValueError("density_factors must be finite numbers.")
+
+    if len(spec.category_cutoffs) != len(CATEGORY_NAMES) - 1:
+        raise ValueError(f"category_cutoffs must have {len(CATEGORY_NAMES) - 1} values.")
+    for name, ladder in [
+        ("category_cutoffs", spec.category_cutoffs),
+        ("percentile_cutoffs", spec.percentile_cutoffs),
+        ("low_screening_age_cutoffs", spec.low_screening_age_cutoffs),
+    ]:
+        if not _is_increasing(ladder):
+            raise ValueError(f"{name} must be strictly increasing.")
+    if not all(0 < c < 100 for c in spec.category_cutoffs + spec.percentile_cutoffs):
+        raise ValueError("score cut-offs must lie strictly between 0 and 100.")
+    # Score-derived metrics are precomputed in 0.01-point bands (see banding.py)
+    if not all(round(c * 100) / 100 == c for c in spec.category_cutoffs + spec.percentile_cutoffs):
+        raise ValueError("score cut-offs must be multiples of 0.01.")
+
+    if len(spec.percentile_values) != len(spec.percentile_cutoffs) + 1:
+        raise ValueError("percentile_values must have one more entry than percentile_cutoffs.")
+    if not all(0 <= v <= 100 for v in spec.percentile_values):
+        raise ValueError("percentile_values must lie between 0 and 100.")
+
+    if set(spec.category_screening_months) != set(CATEGORY_NAMES[1:]):
+        raise ValueError(f"category_screening_months must have exactly the keys {list(CATEGORY_NAMES[1:])}")
+    if len(spec.low_screening_months) != len(spec.low_screening_age_cutoffs) + 1:
+        raise ValueError("low_screening_months must have one more entry than low_screening_age_cutoffs.")
+    months = list(spec.category_screening_months.values()) + list(spec.low_screening_months)
+    if not all(isinstance(m, int) and not isinstance(m, bool) and m > 0 for m in months):
+        raise ValueError("screening intervals must be positive whole months.")
+
+    if spec.urgency_scale <= 0:
+        raise ValueError("urgency_scale must be positive.")
+
+    return spec
+
+
+DEFAULT_SPEC = ModelSpec(version="1.0.0")
+
+
+class ModelRegistry:
+    """Registry of model specs by version with an atomically swapped active spec.
+
+    Readers take ``registry.active`` once per request and use that spec
+    throughout, so a concurrent swap never mixes coefficients from two
+    versions within one assessment.
+    """
+
+    def __init__(self, default: ModelSpec = DEFAULT_SPEC, reload_interval: float = 1.0):
+        self._specs = {default.version: default}
+        self._default = default
+        self._active = default
+        self._lock = threading.Lock()
+        self._path: Optional[str] = None
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._listeners: list[Callable[[ModelSpec], None]] = []
+        self.reload_interval = reload_interval
+
+    @property
+    def active(self) -> ModelSpec:
+        """The currently active spec."""
+        return self._active
+
+    def add_listener(self, callback: Callable[[ModelSpec], None]) -> None:
+        """Call ``callback(spec)`` whenever a different spec becomes active."""
+        self._listeners.append(callback)
+
+    def _swap_active(self, spec: ModelSpec) -> Optional[ModelSpec]:
+        """Swap in ``spec`` (caller holds the lock); returns it if it is a change."""
+        changed = self._active is not spec
+        self._active = spec
+        return spec if changed else None
+
+    def _notify(self, activated: Optional[ModelSpec]) -> None:
+        """Run listeners for a newly activated spec, outside the lock."""
+        if activated is None:
+            return
+        for callback in self._listeners:
+            try:
+                callback(activated)
+            except Exception:
+                logger.exception("Model spec listener failed")
+
+    def versions(self) -> list[str]:
+        """Registered versions, in registration order."""
+        return list(self._specs)
+
+    def get(self, version: Optional[str] = None) -> ModelSpec:
+        """Return a registered spec, or the active one if ``version`` is None."""
+        if version is None:
+            return self._active
+        try:
+            return self._specs[version]
+        except KeyError:
+            raise ValueError(f"Unknown model version: {version}") from None
+
+    def register(self, spec: ModelSpec, activate: bool = False) -> ModelSpec:
+        """Add a spec. Re-registering a version with different contents is an error."""
+        with self._lock:
+            existing = self._specs.get(spec.version)
+            if existing is not None and existing != spec:
+                raise ValueError(f"Model version {spec.version} is already registered with different coefficients.")
+            self._specs[spec.version] = spec
+            activated = self._swap_active(spec) if activate else None
+        self._notify(activated)
+        return spec
+
+    def activate(self, version: str) -> ModelSpec:
+        """Make a registered version the active one."""
+        with self._lock:
+            activated = self._swap_active(self.get(version))
+        self._notify(activated)
+        return self._active
+
+    def load_file(self, path: str) -> ModelSpec:
+        """Register the specs in a JSON file and activate the file's active spec.
+
+        The whole file is parsed and validated before anything is swapped in,
+        so a bad file leaves the registry unchanged.
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if "models" in data:
+            specs = [ModelSpec.from_dict(d) for d in data["models"]]
+            active_version = data.get("active", specs[-1].version if specs else None)
+        else:
+            specs = [ModelSpec.from_dict(data)]
+            active_version = specs[0].version
+
+        by_version = {spec.version: spec for spec in specs}
+        if active_version not in by_version and active_version not in self._specs:
+            raise ValueError(f"Active model version {active_version} is not defined.")
+        with self._lock:
+            for spec in specs:
+                existing = self._specs.get(spec.version)
+                if existing is not None and existing != spec:
+                    raise ValueError(
+                        f"Model version {spec.version} is already registered with different coefficients."
+                    )
+            self._specs.update(by_version)
+            activated = self._swap_active(by_version.get(active_version) or self._specs[active_version])
+        self._notify(activated)
+        return self._active
+
+    def publish(self, spec: Optional[ModelSpec] = None, activate: Optional[str] = None) -> ModelSpec:
+        """Add a spec and/or switch the active version in the watched file.
+
+        ``register`` and ``activate`` change only this process's registry;
+        ``publish`` writes the change to the watched file, which every worker
+        reloads, and reloads it here immediately. Returns the active spec.
+        """
+        if self._path is None:
+            raise ValueError("No model spec file is being watched.")
+        with _file_lock(self._path):
+            with open(self._path, encoding="utf-8") as f:
+                data = json.load(f)
+            if "models" not in data:
+                data = {"active": data["version"], "models": [data]}
+            defined = {d["version"]: d for d in data["models"]}
+
+            if spec is not None:
+                if spec.version in defined:
+                    if ModelSpec.from_dict(defined[spec.version]) != spec:
+                        raise ValueError(
+                            f"Model version {spec.version} is already registered with different coefficients."
+                        )
+                else:
+                    data["models"].append(spec.to_dict())
+                    defined[spec.version] = data["models"][-1]
+            if activate is not None:
+                if activate not in defined and activate != self._default.version:
+                    raise ValueError(f"Unknown model version: {activate}")
+                data["active"] = activate
+
+            temp_path = f"{self._path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(temp_path, self._path)
+            return self.reload()
+
+    def watch_file(self, path: str) -> ModelSpec:
+        """Load ``path`` now and reload it from ``maybe_reload`` when it changes."""
+        spec = self.load_file(path)
+        self._path = path
+        self._mtime = os.stat(path).st_mtime
+        return spec
+
+    @property
+    def watched_path(self) -> Optional[str]:
+        """The spec file being watched, if any."""
+        return self._path
+
+    def reload(self) -> ModelSpec:
+        """Reload the watched file now, regardless of its modification time."""
+        if self._path is None:
+            raise ValueError("No model spec file is being watched.")
+        self._mtime = os.stat(self._path).st_mtime
+        return self.load_file(self._path)
+
+    def maybe_reload(self) -> bool:
+        """Reload the watched file if it changed; cheap enough to call per request.
+
+        The file is stat'ed at most once per ``reload_interval`` seconds.
+        Returns True if a new file was loaded.
+        """
+        if self._path is None:
+            return False
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.reload_interval
+        try:
+            mtime = os.stat(self._path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            self.load_file(self._path)
+        except (OSError, ValueError, TypeError):
+            # Keep serving the current spec; the next edit to the file retries
+            logger.exception("Failed to reload model spec from %s", self._path)
+            return False
+        return True
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """Serialize read-modify-write of ``path`` across processes."""
+    with open(path + ".lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+model_registry = ModelRegistry()
+
+
+def get_spec(version: Optional[str] = None) -> ModelSpec:
+    """Return a spec by version from the process-wide registry (active if None)."""
+    return model_registry.get(version)
+
+
+def resolve_spec(spec: Optional[ModelSpec], version: Optional[str]) -> ModelSpec:
+    """Return ``spec`` if given, else the registered spec for ``version``.
+
+    Results scored with an unregistered spec (e.g. one built by
+    ``with_overrides``) cannot be looked up by version; callers must pass
+    that spec explicitly.
+    """
+    if spec is not None:
+        return spec
+    try:
+        return get_spec(version)
+    except ValueError:
+        raise ValueError(
+            f"Model version {version} is not registered; pass the spec that scored the result."
+        ) from None
+
+
+def with_overrides(spec: ModelSpec, version: str, **changes) -> ModelSpec:
+    """Derive a new validated spec version from an existing one."""
+    return replace(spec, version=version, **changes)
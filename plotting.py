@@ -9,7 +9,9 @@ import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import numpy as np
+from typing import Optional
 from breast_cancer_model import RiskAssessmentResult
+from model_spec import ModelSpec, resolve_spec
 
 
 def _apply_style():
@@ -35,20 +37,25 @@ def fig_to_png_bytes(fig: plt.Figure) -> bytes:
     """Return PNG bytes for a Matplotlib figure."""
     buf = io.BytesIO()
     fig.savefig(buf, format="png", bbox_inches="tight")
-    buf.seek(0)
     png_bytes = buf.getvalue()
     plt.close(fig)
     return png_bytes
 
 
-def plot_risk_score(result: RiskAssessmentResult) -> plt.Figure:
-    """Create a risk score visualization with category indicators."""
+def plot_risk_score(result: RiskAssessmentResult, spec: Optional[ModelSpec] = None) -> plt.Figure:
+    """Create a risk score visualization with category indicators.
+
+    Category bands come from ``spec``, which defaults to the registered spec
+    that produced ``result`` and must be passed if that spec is unregistered.
+    """
     _apply_style()
     fig, ax = plt.subplots(figsize=(8, 4))
 
-    # Risk categories and their ranges
+    # Risk categories and their ranges (from the spec that scored the result)
+    spec = resolve_spec(spec, result.model_version)
     categories = ["Low", "Moderate", "High", "Very High"]
-    ranges = [(0, 15), (15, 25), (25, 40), (40, 100)]
+    edges = (0,) + tuple(spec.category_cutoffs) + (100,)
+    ranges = list(zip(edges[:-1], edges[1:]))
     colors = ["#2ca02c", "#ffbb78", "#ff7f0e", "#d62728"]
 
     # Draw category bands
@@ -0,0 +1,206 @@
+"""Precomputed assessments and chart images for the built-in risk presets.
+
+Presets are fixed, so under a given model version their serialized
+parameters, assessments, metrics and PNG charts never change. They are
+computed once per version and stored as immutable byte assets with strong
+ETags and precompressed variants.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from breast_cancer_model import BreastCancerParams, RiskAssessmentResult, assess_breast_cancer_risk
+from compression import available_encodings, encode
+from metrics import RiskMetrics, compute_metrics
+from model_spec import ModelSpec, get_spec
+from plotting import plot_risk_score, plot_contributing_factors, plot_risk_timeline, fig_to_png_bytes
+from serialization import assessment_to_dict, params_to_dict
+import presets
+
+
+logger = logging.getLogger(__name__)
+
+PRESET_FACTORIES: dict[str, Callable[[], BreastCancerParams]] = {
+    "low_risk": presets.low_risk_profile,
+    "moderate_risk": presets.moderate_risk_profile,
+    "high_risk": presets.high_risk_profile,
+    "very_high_risk": presets.very_high_risk_profile,
+}
+
+PLOT_KINDS = ("risk_score", "factors", "timeline")
+
+# Only keep a compressed variant if it saves at least this fraction of bytes
+# (PNGs are already deflated and rarely benefit).
+MIN_COMPRESSION_SAVING = 0.1
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    """An immutable response body with precompressed variants."""
+
+    body: bytes
+    mimetype: str
+    digest: str  # hex content hash of the identity body
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+    def variant(self, encoding: Optional[str]) -> tuple[bytes, str]:
+        """Return ``(body, etag)`` for an encoding, or identity if None."""
+        if encoding is None:
+            return self.body, self.digest
+        return self.encoded[encoding], f"{self.digest}-{encoding}"
+
+
+def make_asset(body: bytes, mimetype: str) -> StaticAsset:
+    """Hash and precompress a response body."""
+    encoded = {}
+    for encoding in available_encodings():
+        compressed = encode(body, encoding, level=9 if encoding == "gzip" else 11)
+        if len(compressed) <= len(body) * (1 - MIN_COMPRESSION_SAVING):
+            encoded[encoding] = compressed
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return StaticAsset(body=body, mimetype=mimetype, digest=digest, encoded=encoded)
+
+
+def _json_bytes(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass
+class PresetEntry:
+    """A preset profile together with its precomputed outputs."""
+
+    name: str
+    params: BreastCancerParams
+    result: RiskAssessmentResult
+    metrics: RiskMetrics
+    assessment: StaticAsset
+    plots: dict[str, StaticAsset]
+
+
+@dataclass
+class PresetRegistry:
+    """All precomputed presets plus the serialized preset index."""
+
+    model_version: str
+    entries: dict[str, PresetEntry]
+    index: StaticAsset
+
+    def asset(self, name: str, kind: str) -> Optional[StaticAsset]:
+        """Return the ``assessment`` or plot asset for a preset, if any."""
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        if kind == "assessment":
+            return entry.assessment
+        return entry.plots.get(kind)
+
+
+def _build_entry(name: str, params: BreastCancerParams, spec: ModelSpec) -> PresetEntry:
+    result = assess_breast_cancer_risk(params, spec)
+    metrics = compute_metrics(result, params, spec)
+    assessment = make_asset(_json_bytes(assessment_to_dict(result, metrics, params)), "application/json")
+    figures = {
+        "risk_score": plot_risk_score(result, spec),
+        "factors": plot_contributing_factors(result),
+        "timeline": plot_risk_timeline(params.age, result.risk_score),
+    }
+    plots = {kind: make_asset(fig_to_png_bytes(fig), "image/png") for kind, fig in figures.items()}
+    return PresetEntry(
+        name=name,
+        params=params,
+        result=result,
+        metrics=metrics,
+        assessment=assessment,
+        plots=plots,
+    )
+
+
+def build_preset_registry(spec: ModelSpec) -> PresetRegistry:
+    """Compute every preset's assessment, metrics and charts under a model spec."""
+    entries = {name: _build_entry(name, factory(), spec) for name, factory in PRESET_FACTORIES.items()}
+
+    # Asset URLs carry the content digest so clients can cache them forever
+    assets = {}
+    for name, entry in entries.items():
+        urls = {"assessment": f"/api/presets/{name}/assessment?v={entry.assessment.digest}"}
+        for kind, plot in entry.plots.items():
+            urls[f"plot_{kind}"] = f"/api/presets/{name}/plot/{kind}?v={plot.digest}"
+        assets[name] = urls
+
+    index = make_asset(_json_bytes({
+        "presets": {name: params_to_dict(entry.params) for name, entry in entries.items()},
+        "assets": assets,
+        "model_version": spec.version,
+    }), "application/json")
+    return PresetRegistry(model_version=spec.version, entries=entries, index=index)
+
+
+# Keyed by model version; a version's coefficients never change
+_registries: dict[str, PresetRegistry] = {}
+_registry_lock = threading.Lock()
+
+# Background builds for newly activated versions, one at a time
+_builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preset-build")
+_pending: dict[str, Future] = {}
+_pending_lock = threading.Lock()
+_latest: Optional[PresetRegistry] = None  # last registry served for the active spec
+
+
+def _build(spec: ModelSpec) -> PresetRegistry:
+    # pyplot is not thread-safe, so only one thread may build a registry
+    with _registry_lock:
+        registry = _registries.get(spec.version)
+        if registry is None:
+            registry = _registries[spec.version] = build_preset_registry(spec)
+    return registry
+
+
+def _build_in_background(spec: ModelSpec) -> PresetRegistry:
+    try:
+        return _build(spec)
+    except Exception:
+        logger.exception("Failed to build presets for model version %s", spec.version)
+        with _pending_lock:
+            _pending.pop(spec.version, None)  # retry on a later request
+        raise
+
+
+def prepare_preset_registry(spec: ModelSpec) -> Future:
+    """Start building a version's registry in the background (once per version).
+
+    Register as a ``ModelRegistry`` listener so a newly activated version is
+    rendered before requests ask for it.
+    """
+    with _pending_lock:
+        future = _pending.get(spec.version)
+        if future is None:
+            future = _pending[spec.version] = _builder.submit(_build_in_background, spec)
+    return future
+
+
+def get_preset_registry(spec: Optional[ModelSpec] = None) -> PresetRegistry:
+    """Return the preset registry for a model spec (the active one by default).
+
+    Each version's registry is built once and then reused. For the active
+    spec, a version whose registry is still being built in the background
+    is not waited for: the previously served registry is returned until it
+    is ready. Only the very first build blocks.
+    """
+    global _latest
+    if spec is not None:
+        return _registries.get(spec.version) or _build(spec)
+
+    spec = get_spec()
+    registry = _registries.get(spec.version)
+    if registry is None:
+        if _latest is not None:
+            prepare_preset_registry(spec)
+            return _latest
+        registry = _build(spec)
+    _latest = registry
+    return registry
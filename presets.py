@@ -55,3 +55,17 @@ def very_high_risk_profile() -> BreastCancerParams:
         first_menstruation_age=10.0,
         first_pregnancy_age=None,
     )
+
+def reference_profile() -> BreastCancerParams:
+    """Average-risk woman used as the baseline for score explanations."""
+    return BreastCancerParams(
+        age=50.0,
+        bmi=25.0,
+        family_history=False,
+        breast_density="medium",
+        menopausal_status="postmenopausal",
+        hormone_use=False,
+        previous_biopsies=0,
+        first_menstruation_age=13.0,
+        first_pregnancy_age=26.0,
+    )
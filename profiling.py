@@ -0,0 +1,224 @@
+"""Opt-in per-request profiling for the Flask API.
+
+A request is profiled when profiling is enabled and it carries the
+``X-Profile`` header from an authorized (admin) caller, or when it is picked
+by ``PROFILE_SAMPLE_RATE``.
+Two profilers are available:
+
+* ``sample`` (default): a background thread samples the request thread's
+  stack every ``PROFILE_SAMPLE_INTERVAL`` seconds and aggregates them as
+  folded stacks (``frame;frame;frame count``), the input format of
+  flamegraph.pl, speedscope and inferno.
+* ``cprofile``: deterministic cProfile; exported as a pstats dump that
+  snakeviz, gprof2dot and flameprof can load.
+
+The last ``PROFILE_BUFFER_SIZE`` profiles are kept in a ring buffer.
+"""
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+PROFILE_MODES = ("sample", "cprofile")
+
+DEFAULT_CONFIG = {
+    "PROFILING_ENABLED": False,  # allow header-triggered profiling
+    "PROFILE_SAMPLE_RATE": 0.0,  # fraction of all requests to profile
+    "PROFILE_DEFAULT_MODE": "sample",
+    "PROFILE_SAMPLE_INTERVAL": 0.001,  # seconds between stack samples
+    "PROFILE_BUFFER_SIZE": 20,
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Sample one thread's Python stack on a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+
+
+@dataclass
+class ProfileRecord:
+    """One captured request profile."""
+
+    id: str
+    mode: str  # one of PROFILE_MODES
+    method: str
+    path: str
+    status: Optional[int]
+    started_at: float
+    duration: float  # seconds
+    folded: Optional[Counter] = None  # sample mode: {folded_stack: count}
+    stats: Optional[dict] = None  # cprofile mode: raw pstats data
+
+    def summary(self) -> dict:
+        """Metadata for listings."""
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": sum(self.folded.values()) if self.folded is not None else None,
+            "formats": ["folded", "text"] if self.mode == "sample" else ["pstats", "text"],
+        }
+
+    def to_folded(self) -> str:
+        """Folded stacks, one ``stack count`` line each (sample mode only)."""
+        if self.folded is None:
+            raise ValueError("folded stacks are only available for sampled profiles")
+        return "".join(f"{stack} {count}\n" for stack, count in self.folded.most_common())
+
+    def to_pstats(self) -> bytes:
+        """A pstats dump, as written by ``Stats.dump_stats`` (cprofile mode only)."""
+        if self.stats is None:
+            raise ValueError("pstats output is only available for cProfile profiles")
+        return marshal.dumps(self.stats)
+
+    def to_text(self, limit: int = 40) -> str:
+        """Human-readable summary."""
+        if self.stats is None:
+            return self.to_folded()
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.stats = self.stats
+        stats.get_top_level_stats()
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+
+class ProfileStore:
+    """Bounded ring buffer of the most recent profiles."""
+
+    def __init__(self, size: int):
+        self._records: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, record: ProfileRecord) -> None:
+        with self._lock:
+            self._records.append(record)
+
+    def list(self) -> list[ProfileRecord]:
+        """Profiles, newest first."""
+        with self._lock:
+            return list(reversed(self._records))
+
+    def get(self, profile_id: str) -> Optional[ProfileRecord]:
+        with self._lock:
+            for record in self._records:
+                if record.id == profile_id:
+                    return record
+        return None
+
+
+def _requested_mode(config, header: Optional[str], authorized: Callable[[], bool]) -> Optional[str]:
+    """Decide whether (and how) to profile a request."""
+    if header and config["PROFILING_ENABLED"] and authorized():
+        header = header.strip().lower()
+        return header if header in PROFILE_MODES else config["PROFILE_DEFAULT_MODE"]
+    if config["PROFILE_SAMPLE_RATE"] > 0 and random.random() < config["PROFILE_SAMPLE_RATE"]:
+        return config["PROFILE_DEFAULT_MODE"]
+    return None
+
+
+def init_profiling(app, authorize: Optional[Callable[[], bool]] = None) -> ProfileStore:
+    """Register request profiling hooks on a Flask app.
+
+    Settings are read from ``app.config`` (see ``DEFAULT_CONFIG``); the ring
+    buffer is created with the configured size and stored in
+    ``app.extensions["profiles"]``. ``authorize`` is called during a request
+    carrying ``X-Profile`` and must return True for the header to be honoured;
+    without it only ``PROFILE_SAMPLE_RATE`` triggers profiling.
+    """
+    from flask import g, request
+
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+    store = app.extensions["profiles"] = ProfileStore(app.config["PROFILE_BUFFER_SIZE"])
+
+    @app.before_request
+    def start_profile():
+        mode = _requested_mode(app.config, request.headers.get("X-Profile"), authorize or (lambda: False))
+        if mode is None:
+            return
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(threading.get_ident(), app.config["PROFILE_SAMPLE_INTERVAL"])
+            profiler.start()
+        g.profile = (uuid.uuid4().hex[:16], mode, profiler, time.time(), time.perf_counter())
+
+    @app.after_request
+    def tag_profile(response):
+        if "profile" in g:
+            response.headers["X-Profile-Id"] = g.profile[0]
+            g.profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_profile(exc):
+        state = g.pop("profile", None)
+        if state is None:
+            return
+        profile_id, mode, profiler, started_at, start = state
+        if mode == "cprofile":
+            profiler.disable()
+            profiler.create_stats()
+            folded, stats = None, profiler.stats
+        else:
+            folded, stats = profiler.stop(), None
+        store.add(ProfileRecord(
+            id=profile_id,
+            mode=mode,
+            method=request.method,
+            path=request.full_path.rstrip("?"),
+            status=g.pop("profile_status", None),
+            started_at=started_at,
+            duration=time.perf_counter() - start,
+            folded=folded,
+            stats=stats,
+        ))
+
+    return store
@@ -0,0 +1,158 @@
+"""Bulk screening schedules built from batch risk metrics.
+
+Turns each patient's ``screening_frequency_months`` into a next-due date
+with vectorized calendar arithmetic, and keeps the due dates in a sorted
+index so range queries ("who is due in the next 30 days") and monthly
+capacity forecasts are answered by binary search instead of a full scan.
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+
+from breast_cancer_model import PatientBatch, calculate_risk_scores
+from metrics import BatchRiskMetrics, compute_metrics_batch
+from model_spec import ModelSpec
+
+
+DateLike = Union[str, datetime.date, np.datetime64]
+
+
+def _day(value: DateLike) -> np.datetime64:
+    return np.datetime64(value, "D")
+
+
+def add_months(dates: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """Add whole months to dates, clipping to the end of shorter months.
+
+    ``2024-01-31 + 1 month`` is ``2024-02-29``, as a clinic calendar would
+    book it. Both arguments broadcast; NaT dates stay NaT.
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    month_start = dates.astype("datetime64[M]")
+    day_of_month = dates - month_start.astype("datetime64[D]")
+
+    target = month_start + np.asarray(months).astype("timedelta64[M]")
+    month_length = (target + 1).astype("datetime64[D]") - target.astype("datetime64[D]")
+    return target.astype("datetime64[D]") + np.minimum(day_of_month, month_length - 1)
+
+
+def next_due_dates(
+    last_screening_dates: np.ndarray,
+    screening_frequency_months: np.ndarray,
+    today: Optional[DateLike] = None,
+) -> np.ndarray:
+    """Next-due dates: last screening plus the recommended interval.
+
+    Patients never screened (NaT) are due ``today``. Overdue patients keep
+    their past due date, so they can be found with ``ScreeningSchedule.overdue``.
+    """
+    today = _day(today or datetime.date.today())
+    due = add_months(last_screening_dates, screening_frequency_months)
+    return np.where(np.isnat(due), today, due)
+
+
+@dataclass
+class ScreeningSchedule:
+    """Due dates for a registry, indexed for sublinear date-range queries.
+
+    ``due_dates`` is sorted ascending and ``patient_ids`` is aligned with it.
+    """
+
+    patient_ids: np.ndarray
+    due_dates: np.ndarray
+
+    @classmethod
+    def build(cls, patient_ids: np.ndarray, due_dates: np.ndarray) -> "ScreeningSchedule":
+        """Sort patients by due date (stable, so ties keep registry order)."""
+        due_dates = np.asarray(due_dates, dtype="datetime64[D]")
+        order = np.argsort(due_dates, kind="stable")
+        return cls(patient_ids=np.asarray(patient_ids)[order], due_dates=due_dates[order])
+
+    def __len__(self) -> int:
+        return len(self.due_dates)
+
+    def _span(self, start: Optional[DateLike], end: Optional[DateLike]) -> slice:
+        lo = 0 if start is None else np.searchsorted(self.due_dates, _day(start), side="left")
+        hi = len(self) if end is None else np.searchsorted(self.due_dates, _day(end), side="left")
+        return slice(lo, max(lo, hi))
+
+    def due_between(self, start: Optional[DateLike], end: Optional[DateLike]) -> np.ndarray:
+        """Patients due in ``[start, end)``; None leaves that side open."""
+        return self.patient_ids[self._span(start, end)]
+
+    def count_between(self, start: Optional[DateLike], end: Optional[DateLike]) -> int:
+        """Number of patients due in ``[start, end)``, in O(log n)."""
+        span = self._span(start, end)
+        return span.stop - span.start
+
+    def due_within(self, days: int, today: Optional[DateLike] = None) -> np.ndarray:
+        """Patients due from ``today`` up to (not including) ``today + days``."""
+        today = _day(today or datetime.date.today())
+        return self.due_between(today, today + np.timedelta64(days, "D"))
+
+    def overdue(self, today: Optional[DateLike] = None) -> np.ndarray:
+        """Patients whose due date is before ``today``."""
+        return self.due_between(None, _day(today or datetime.date.today()))
+
+    def monthly_capacity(
+        self,
+        start_month: DateLike,
+        months: int,
+        include_overdue: bool = True,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Forecast screenings due per calendar month.
+
+        Returns ``(month_starts, counts)`` for ``months`` months beginning
+        with the month containing ``start_month``. With ``include_overdue``
+        the backlog due before that month is added to the first month.
+        """
+        first = np.datetime64(start_month, "M")
+        boundaries = (first + np.arange(months + 1)).astype("datetime64[D]")
+        positions = np.searchsorted(self.due_dates, boundaries, side="left")
+        counts = np.diff(positions)
+        if include_overdue and months > 0:
+            counts[0] += positions[0]
+        return boundaries[:-1], counts
+
+
+def plan_screenings(
+    patient_ids: np.ndarray,
+    last_screening_dates: np.ndarray,
+    metrics: BatchRiskMetrics,
+    today: Optional[DateLike] = None,
+) -> ScreeningSchedule:
+    """Build a schedule from batch metrics and each patient's last screening.
+
+    Parameters
+    ----------
+    patient_ids : np.ndarray
+        Registry identifiers, aligned with ``metrics``.
+    last_screening_dates : np.ndarray
+        Last screening per patient (``datetime64``; NaT if never screened).
+    metrics : BatchRiskMetrics
+        Output of ``compute_metrics_batch``.
+    today : Optional[DateLike]
+        Due date assigned to never-screened patients; defaults to today.
+
+    Returns
+    -------
+    ScreeningSchedule
+        Patients indexed by next-due date.
+    """
+    due = next_due_dates(last_screening_dates, metrics.screening_frequency_months, today)
+    return ScreeningSchedule.build(patient_ids, due)
+
+
+def plan_screenings_for_batch(
+    patient_ids: np.ndarray,
+    batch: PatientBatch,
+    last_screening_dates: np.ndarray,
+    spec: Optional[ModelSpec] = None,
+    today: Optional[DateLike] = None,
+) -> ScreeningSchedule:
+    """Score a PatientBatch and plan its screenings in one call."""
+    metrics = compute_metrics_batch(calculate_risk_scores(batch, spec), batch.age, spec)
+    return plan_screenings(patient_ids, last_screening_dates, metrics, today)
@@ -0,0 +1,162 @@
+"""Conversion between API JSON payloads and model objects."""
+
+import numpy as np
+import pandas as pd
+
+from breast_cancer_model import (
+    DENSITY_LEVELS,
+    MENOPAUSAL_STATUSES,
+    BreastCancerParams,
+    PatientBatch,
+    RiskAssessmentResult,
+)
+from explain import ScoreExplanation
+from metrics import BatchRiskMetrics, RiskMetrics
+
+
+REQUIRED_FIELDS = [
+    "age", "bmi", "family_history", "breast_density",
+    "menopausal_status", "hormone_use", "previous_biopsies",
+    "first_menstruation_age"
+]
+
+
+def params_from_dict(data: dict) -> BreastCancerParams:
+    """Build BreastCancerParams from a JSON-style dict, coercing field types."""
+    return BreastCancerParams(
+        age=float(data["age"]),
+        bmi=float(data["bmi"]),
+        family_history=bool(data["family_history"]),
+        breast_density=str(data["breast_density"]),
+        menopausal_status=str(data["menopausal_status"]),
+        hormone_use=bool(data["hormone_use"]),
+        previous_biopsies=int(data["previous_biopsies"]),
+        first_menstruation_age=float(data["first_menstruation_age"]),
+        first_pregnancy_age=float(data["first_pregnancy_age"]) if data.get("first_pregnancy_age") is not None else None,
+    )
+
+
+def params_to_dict(params: BreastCancerParams) -> dict:
+    """Serialize BreastCancerParams to a JSON-compatible dict."""
+    return {
+        "age": params.age,
+        "bmi": params.bmi,
+        "family_history": params.family_history,
+        "breast_density": params.breast_density,
+        "menopausal_status": params.menopausal_status,
+        "hormone_use": params.hormone_use,
+        "previous_biopsies": params.previous_biopsies,
+        "first_menstruation_age": params.first_menstruation_age,
+        "first_pregnancy_age": params.first_pregnancy_age,
+    }
+
+
+def assessment_to_dict(
+    result: RiskAssessmentResult,
+    metrics: RiskMetrics,
+    params: BreastCancerParams,
+) -> dict:
+    """Serialize an assessment and its metrics to the /api/assess response shape."""
+    return {
+        "risk_score": round(result.risk_score, 2),
+        "risk_category": result.risk_category,
+        "contributing_factors": {
+            k: round(v, 2) for k, v in result.contributing_factors.items()
+        },
+        "recommendations": result.recommendations,
+        "metrics": {
+            "percentile_rank": round(metrics.percentile_rank, 2),
+            "screening_frequency_months": metrics.screening_frequency_months,
+            "urgency_score": round(metrics.urgency_score, 2),
+        },
+        "patient_age": params.age,
+        "model_version": result.model_version,
+    }
+
+
+def explanation_to_dict(explanation: ScoreExplanation) -> dict:
+    """Serialize a ScoreExplanation to the /api/explain response shape."""
+    return {
+        "risk_score": round(explanation.risk_score, 2),
+        "raw_score": round(explanation.raw_score, 2),
+        "attributions": {
+            k: round(v, 2) for k, v in explanation.attributions.items()
+        },
+        "baseline": {
+            "risk_score": round(explanation.baseline_score, 2),
+            "delta": round(explanation.baseline_delta, 2),
+            "factor_deltas": {
+                k: round(v, 2) for k, v in explanation.factor_deltas.items()
+            },
+        },
+    }
+
+
+BOOL_STRINGS = {"true": True, "yes": True, "1": True, "false": False, "no": False, "0": False}
+
+
+def _bool_column(values: pd.Series, name: str) -> np.ndarray:
+    if values.dtype == bool:
+        return values.to_numpy()
+    if values.dtype == object:
+        parsed = values.astype(str).str.strip().str.lower().map(BOOL_STRINGS)
+    else:
+        parsed = values.map({0: False, 1: True})
+    if parsed.isna().any():
+        raise ValueError(f"{name} must be true/false, yes/no or 1/0")
+    return parsed.to_numpy(dtype=bool)
+
+
+def _code_column(values: pd.Series, levels: tuple, name: str) -> np.ndarray:
+    codes = values.astype(str).str.strip().map({level: code for code, level in enumerate(levels)})
+    if codes.isna().any():
+        raise ValueError(f"{name} must be one of {list(levels)}")
+    return codes.to_numpy(dtype=np.int8)
+
+
+def batch_from_frame(frame: pd.DataFrame) -> PatientBatch:
+    """Build a PatientBatch from a DataFrame with one column per API field.
+    
+    Booleans may be given as bools, 0/1, "true"/"false" or "yes"/"no"; a
+    blank or missing ``first_pregnancy_age`` means no pregnancy. Any other
+    value raises ValueError rather than being coerced.
+    """
+    for field in REQUIRED_FIELDS:
+        if field not in frame.columns:
+            raise ValueError(f"Missing required field: {field}")
+    
+    if "first_pregnancy_age" in frame.columns:
+        values = frame["first_pregnancy_age"]
+        numeric = pd.to_numeric(values, errors="coerce")
+        blank = values.isna() | (values.astype(str).str.strip() == "")
+        if (numeric.isna() & ~blank).any():
+            raise ValueError("first_pregnancy_age must be a number or blank")
+        pregnancy = numeric.to_numpy(dtype=np.float64)
+    else:
+        pregnancy = np.full(len(frame), np.nan)
+    
+    try:
+        return PatientBatch(
+            age=frame["age"].to_numpy(dtype=np.float64),
+            bmi=frame["bmi"].to_numpy(dtype=np.float64),
+            family_history=_bool_column(frame["family_history"], "family_history"),
+            breast_density=_code_column(frame["breast_density"], DENSITY_LEVELS, "breast_density"),
+            menopausal_status=_code_column(frame["menopausal_status"], MENOPAUSAL_STATUSES, "menopausal_status"),
+            hormone_use=_bool_column(frame["hormone_use"], "hormone_use"),
+            previous_biopsies=frame["previous_biopsies"].to_numpy(dtype=np.int64),
+            first_menstruation_age=frame["first_menstruation_age"].to_numpy(dtype=np.float64),
+            first_pregnancy_age=pregnancy,
+        )
+    except (TypeError, pd.errors.IntCastingNaNError) as e:
+        raise ValueError(f"Invalid patient data: {e}") from None
+
+
+def batch_metrics_to_frame(metrics: BatchRiskMetrics) -> pd.DataFrame:
+    """Tabulate batch metrics with the same column names as /api/assess."""
+    return pd.DataFrame({
+        "risk_score": np.round(metrics.risk_scores, 2),
+        "risk_category": metrics.category_names(),
+        "percentile_rank": np.round(metrics.percentile_ranks, 2),
+        "screening_frequency_months": metrics.screening_frequency_months,
+        "urgency_score": np.round(metrics.urgency_scores, 2),
+    })
@@ -0,0 +1,102 @@
+"""Reproducible synthetic patient populations for load and batch testing.
+
+Draws columnar ``PatientBatch`` populations with plausible joint
+distributions (menopause and breast density depend on age, hormone use on
+menopausal status, first pregnancy on menarche). Generation is fully
+vectorized, so millions of rows take well under a second.
+"""
+
+from typing import Iterator, Optional
+
+import numpy as np
+
+from breast_cancer_model import PatientBatch
+
+# Density class probabilities ("low", "medium", "high", "very_high")
+# for patients under 50 and 50 or older; density declines with age.
+DENSITY_PROBS_UNDER_50 = np.array([0.10, 0.40, 0.40, 0.10])
+DENSITY_PROBS_OVER_50 = np.array([0.20, 0.50, 0.25, 0.05])
+
+FAMILY_HISTORY_RATE = 0.12
+NULLIPARITY_RATE = 0.20
+HORMONE_USE_RATE_POST = 0.15
+HORMONE_USE_RATE_PRE = 0.03
+MEAN_BIOPSIES = 0.15
+
+
+def generate_patients(
+    n: int,
+    seed: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> PatientBatch:
+    """Generate ``n`` synthetic patients that pass ``validate_batch``.
+
+    Parameters
+    ----------
+    n : int
+        Number of patients.
+    seed : Optional[int]
+        Seed for a fresh ``numpy.random.Generator``; same seed, same batch.
+    rng : Optional[numpy.random.Generator]
+        Generator to draw from instead of ``seed`` (used for chunked streams).
+
+    Returns
+    -------
+    PatientBatch
+        Columnar patient parameters.
+    """
+
+    if rng is None:
+        rng = np.random.default_rng(seed)
+
+    # Ages are whole years, centred on the screening population
+    age = np.rint(np.clip(rng.normal(52.0, 13.0, n), 25.0, 90.0))
+
+    # Probability of being postmenopausal rises steeply around 51
+    p_post = 1.0 / (1.0 + np.exp(-(age - 51.0) / 2.5))
+    postmenopausal = rng.random(n) < p_post
+
+    bmi = np.round(np.clip(rng.lognormal(np.log(26.5), 0.18, n), 15.0, 55.0), 1)
+
+    density_cdf = np.where(
+        (age < 50)[:, None],
+        np.cumsum(DENSITY_PROBS_UNDER_50),
+        np.cumsum(DENSITY_PROBS_OVER_50),
+    )
+    breast_density = (rng.random(n)[:, None] > density_cdf[:, :-1]).sum(axis=1).astype(np.int8)
+
+    hormone_use = rng.random(n) < np.where(postmenopausal, HORMONE_USE_RATE_POST, HORMONE_USE_RATE_PRE)
+    previous_biopsies = np.minimum(rng.poisson(MEAN_BIOPSIES, n), 6)
+    first_menstruation_age = np.rint(np.clip(rng.normal(12.5, 1.3, n), 8.0, 20.0))
+
+    first_pregnancy_age = np.rint(
+        np.clip(rng.normal(27.0, 5.0, n), first_menstruation_age + 3.0, np.minimum(age, 45.0))
+    )
+    first_pregnancy_age[rng.random(n) < NULLIPARITY_RATE] = np.nan
+
+    return PatientBatch(
+        age=age,
+        bmi=bmi,
+        family_history=rng.random(n) < FAMILY_HISTORY_RATE,
+        breast_density=breast_density,
+        menopausal_status=postmenopausal.astype(np.int8),
+        hormone_use=hormone_use,
+        previous_biopsies=previous_biopsies.astype(np.int64),
+        first_menstruation_age=first_menstruation_age,
+        first_pregnancy_age=first_pregnancy_age,
+    )
+
+
+def iter_patient_chunks(
+    n: int,
+    chunk_size: int = 1_000_000,
+    seed: Optional[int] = None,
+) -> Iterator[PatientBatch]:
+    """Yield ``n`` synthetic patients as batches of at most ``chunk_size``.
+
+    The stream is reproducible for a given ``seed`` and ``chunk_size``.
+    """
+
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, chunk_size):
+        yield generate_patients(min(chunk_size, n - start), rng=rng)
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from banding import N_BANDS, build_band_table, get_band_table
+from metrics import compute_metrics_batch
+from model_spec import CATEGORY_NAMES, DEFAULT_SPEC, ModelSpec, with_overrides
+
+
+def ladder(cutoffs, values, x):
+    """Reference threshold ladder: value of the first cut-off x is below."""
+    for cutoff, value in zip(cutoffs, values):
+        if x < cutoff:
+            return value
+    return values[-1]
+
+
+def boundary_scores(cutoffs):
+    scores = [0.0, 100.0, 24.999999999999996, 0.1 + 0.2, 14.35]
+    for c in cutoffs:
+        scores += [c, np.nextafter(c, -np.inf), np.nextafter(c, np.inf), c - 0.01, c + 0.01]
+    return np.array(scores)
+
+
+@pytest.mark.parametrize("spec", [
+    DEFAULT_SPEC,
+    with_overrides(DEFAULT_SPEC, "test-banding-offgrid", category_cutoffs=(14.35, 25.07, 40.29),
+                   percentile_cutoffs=(0.29, 14.35, 57.01, 99.99)),
+])
+def test_table_matches_threshold_ladders(spec):
+    """Test banded lookups against direct threshold comparisons, at and around cut-offs."""
+    table = build_band_table(spec)
+    rng = np.random.default_rng(0)
+    scores = np.concatenate([
+        rng.uniform(0, 100, 20_000),
+        np.round(rng.uniform(0, 100, 20_000), 2),
+        boundary_scores(spec.category_cutoffs + spec.percentile_cutoffs),
+    ])
+    ages = rng.uniform(20, 90, len(scores))
+    
+    bands = table.band_index(scores)
+    groups = table.age_groups(ages)
+    for score, band, age, group in zip(scores, bands, ages, groups):
+        assert table.band_index(float(score)) == band
+        category, percentile_rank, months = table.lookup(float(score), float(age))
+        assert category == CATEGORY_NAMES[table.categories[band]] == table.category(float(score))
+        assert percentile_rank == table.percentile_ranks[band]
+        assert months == table.screening_months[band, group]
+    for score, band, age, group in zip(scores, bands, ages, groups):
+        category = ladder(spec.category_cutoffs, CATEGORY_NAMES, score)
+        assert CATEGORY_NAMES[table.categories[band]] == category
+        assert table.percentile_ranks[band] == ladder(spec.percentile_cutoffs, spec.percentile_values, score)
+        expected_months = (
+            ladder(spec.low_screening_age_cutoffs, spec.low_screening_months, age)
+            if category == "low" else spec.category_screening_months[category]
+        )
+        assert table.screening_months[band, group] == expected_months
+
+
+def test_scalar_and_batch_lookups_agree():
+    """Test scalar band lookups and the table shape."""
+    table = get_band_table(DEFAULT_SPEC)
+    assert table.screening_months.shape == (N_BANDS, 3)
+    assert table.band_index(15.0) == 1500
+    assert table.band_index(100.0) == N_BANDS - 1
+    assert table.category(39.99) == "high"
+    assert list(table.band_index(np.array([15.0, 39.99]))) == [1500, 3999]
+
+
+def test_urgency_is_not_banded():
+    """Test that urgency is exact, not quantized to the band edge."""
+    metrics = compute_metrics_batch(np.array([28.76, 60.0]), np.array([45.0, 45.0]), DEFAULT_SPEC)
+    assert list(metrics.urgency_scores) == [28.76 / 50.0, 1.0]
+    assert round(metrics.urgency_scores[0], 2) == 0.58
+
+
+def test_spec_rejects_cutoffs_off_the_band_grid():
+    """Test that cut-offs must be multiples of the band resolution."""
+    with pytest.raises(ValueError):
+        ModelSpec(version="bad", category_cutoffs=(15.005, 25.0, 40.0))
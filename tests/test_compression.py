@@ -0,0 +1,44 @@
+import gzip
+import json
+
+from app import app
+from compression import negotiate, parse_accept_encoding
+from preset_registry import PRESET_FACTORIES
+from serialization import params_to_dict
+
+
+def test_accept_encoding_negotiation():
+    """Test q-value parsing and encoding selection."""
+    assert parse_accept_encoding("gzip;q=0.5, br") == {"gzip": 0.5, "br": 1.0}
+    assert negotiate("gzip, deflate", ["gzip"]) == "gzip"
+    assert negotiate("gzip;q=0", ["gzip"]) is None
+    assert negotiate("identity", ["gzip"]) is None
+    assert negotiate("*", ["gzip"]) == "gzip"
+    assert negotiate(None) is None
+
+
+def test_json_responses_compressed_above_threshold():
+    """Test that JSON bodies are gzipped only when large enough and accepted."""
+    client = app.test_client()
+    payload = params_to_dict(PRESET_FACTORIES["very_high_risk"]())
+    
+    plain = client.post("/api/assess", json=payload)
+    assert "Content-Encoding" not in plain.headers
+    
+    compressed = client.post("/api/assess", json=payload, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
+    
+    small = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+
+def test_plot_response_has_content_length():
+    """Test that plot PNGs are sent uncompressed with Content-Length."""
+    client = app.test_client()
+    payload = params_to_dict(PRESET_FACTORIES["low_risk"]())
+    response = client.post("/api/plot/risk_score", json=payload, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.mimetype == "image/png"
+    assert "Content-Encoding" not in response.headers
+    assert int(response.headers["Content-Length"]) == len(response.data)
@@ -0,0 +1,55 @@
+import numpy as np
+
+from breast_cancer_model import BreastCancerParams, PatientBatch, assess_breast_cancer_risk
+from dedup import assess_batch_deduplicated, effective_keys
+from metrics import compute_metrics
+from model_spec import DEFAULT_SPEC, with_overrides
+from synthetic import generate_patients
+
+
+def test_matches_per_row_assessment():
+    """Test deduplicated results against assessing every row individually."""
+    spec = with_overrides(DEFAULT_SPEC, "test-dedup-zero-factors", hormone_factor=0.0, biopsy_factor=0.0)
+    for spec in (DEFAULT_SPEC, spec):
+        batch = generate_patients(3000, seed=11)
+        dedup = assess_batch_deduplicated(batch, spec)
+        metrics = dedup.batch_metrics()
+        for i in range(len(batch)):
+            params = batch.to_params(i)
+            expected = assess_breast_cancer_risk(params, spec)
+            assert dedup.result(i) == expected
+            assert dedup.row_metrics(i) == compute_metrics(expected, params, spec)
+            assert metrics.risk_scores[i] == expected.risk_score
+            assert metrics.category_names()[i] == expected.risk_category
+
+
+def test_thresholded_inputs_collapse():
+    """Test that inputs differing only below model thresholds share a key."""
+    base = dict(family_history=False, breast_density="medium", menopausal_status="premenopausal",
+                hormone_use=False, previous_biopsies=0, first_menstruation_age=13, first_pregnancy_age=25)
+    patients = [
+        BreastCancerParams(age=42, bmi=22.0, **base),
+        BreastCancerParams(age=45, bmi=24.0, **base),
+        BreastCancerParams(age=45, bmi=29.0, **base),  # BMI > healthy_bmi_max changes advice
+        BreastCancerParams(age=50, bmi=22.0, **base),  # age factor present, with value 0
+    ]
+    batch = PatientBatch.from_params(patients)
+    keys = effective_keys(batch)
+    assert np.array_equal(keys[0], keys[1])
+    assert not np.array_equal(keys[1], keys[2])
+    assert not np.array_equal(keys[0], keys[3])
+
+    dedup = assess_batch_deduplicated(batch)
+    assert dedup.stats() == {"rows": 4, "unique_profiles": 3, "dedup_ratio": 1.33}
+    assert dedup.result(0) is dedup.result(1)
+
+
+def test_skewed_registry_dedup_ratio():
+    """Test the dedup ratio on a registry with coarse, repetitive inputs."""
+    batch = generate_patients(50_000, seed=3)
+    batch.age = np.round(batch.age / 5) * 5
+    batch.bmi = np.round(batch.bmi)
+    dedup = assess_batch_deduplicated(batch)
+    assert len(dedup) == 50_000
+    assert dedup.dedup_ratio > 4
+    assert dedup.dedup_ratio == len(batch) / dedup.n_unique
@@ -0,0 +1,59 @@
+import numpy as np
+
+from app import app
+from breast_cancer_model import FACTOR_NAMES, PatientBatch, assess_breast_cancer_risk, calculate_risk_scores
+from explain import explain, explain_batch
+from presets import high_risk_profile, low_risk_profile, reference_profile, very_high_risk_profile
+from serialization import params_to_dict
+
+
+def test_batch_scores_match_scalar_model():
+    """Test that vectorized scoring agrees with assess_breast_cancer_risk."""
+    profiles = [low_risk_profile(), high_risk_profile(), very_high_risk_profile(), reference_profile()]
+    scores = calculate_risk_scores(PatientBatch.from_params(profiles))
+    expected = [assess_breast_cancer_risk(p).risk_score for p in profiles]
+    assert np.allclose(scores, expected)
+
+
+def test_attributions_equal_factors_when_unclamped():
+    """Test that counterfactual attributions equal the additive factors below the clamp."""
+    params = high_risk_profile()
+    result = assess_breast_cancer_risk(params)
+    explanation = explain(params)
+    assert explanation.raw_score == explanation.risk_score
+    for name in FACTOR_NAMES:
+        assert np.isclose(explanation.attributions[name], result.contributing_factors.get(name, 0.0))
+
+
+def test_attributions_respect_clamp():
+    """Test that factors removed under the 100% clamp get no counterfactual credit."""
+    params = very_high_risk_profile()
+    params.previous_biopsies = 30
+    explanation = explain(params)
+    assert explanation.raw_score > 100
+    assert explanation.risk_score == 100
+    # Removing any single small factor leaves the score clamped at 100
+    assert explanation.attributions["hormone_use"] == 0.0
+    assert explanation.attributions["previous_biopsies"] > 0
+
+
+def test_reference_profile_has_zero_delta():
+    """Test that the reference profile explains to zero baseline deltas."""
+    batch = explain_batch(PatientBatch.from_params([reference_profile(), low_risk_profile()]))
+    assert batch.baseline_deltas[0] == 0
+    assert not batch.factor_deltas[0].any()
+    assert batch.baseline_deltas[1] < 0
+
+
+def test_explain_endpoint_batch():
+    """Test the explain endpoint in single and batch modes."""
+    client = app.test_client()
+    single = client.post("/api/explain", json=params_to_dict(high_risk_profile())).get_json()
+    assert set(single["attributions"]) == set(FACTOR_NAMES)
+    
+    payload = {"patients": [params_to_dict(low_risk_profile()), params_to_dict(high_risk_profile())]}
+    data = client.post("/api/explain", json=payload).get_json()
+    assert data["explanations"][1] == single
+    
+    payload["patients"][0]["breast_density"] = "extreme"
+    assert client.post("/api/explain", json=payload).status_code == 400
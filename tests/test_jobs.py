@@ -0,0 +1,276 @@
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import app
+from breast_cancer_model import calculate_risk_scores
+from jobs import (
+    CANCELLED,
+    FAILED,
+    ORPHANED_ERROR,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    Job,
+    JobLimitExceeded,
+    JobQueue,
+    MemoryJobStore,
+    SQLiteJobStore,
+)
+from serialization import batch_from_frame, params_to_dict
+from synthetic import generate_patients
+
+
+def write_patients(path, n, seed=0):
+    batch = generate_patients(n, seed=seed)
+    frame = pd.DataFrame([params_to_dict(batch.to_params(i)) for i in range(n)])
+    frame.to_csv(path, index=False)
+    return batch
+
+
+def wait_for(queue, job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job.status in (SUCCEEDED, FAILED, CANCELLED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+@pytest.mark.parametrize("store_kind", ["memory", "sqlite"])
+def test_job_scores_file_in_chunks(tmp_path, store_kind):
+    """Test that a job spools chunked results matching the vectorized model."""
+    store = MemoryJobStore() if store_kind == "memory" else SQLiteJobStore(str(tmp_path / "jobs.db"))
+    queue = JobQueue(store, str(tmp_path / "spool"), workers=1)
+    batch = write_patients(tmp_path / "patients.csv", 250)
+    
+    job = queue.submit("client-a", str(tmp_path / "patients.csv"), chunk_size=100)
+    job = wait_for(queue, job.id)
+    assert job.status == SUCCEEDED
+    assert (job.total_rows, job.rows_done, job.chunks, job.progress) == (250, 250, 3, 1.0)
+    
+    page = queue.result_page(job.id, 2)
+    assert list(page["row"]) == list(range(200, 250))
+    
+    full = pd.read_csv(io.BytesIO(b"".join(queue.iter_results_csv(job.id))))
+    assert len(full) == 250
+    assert np.allclose(full["risk_score"], np.round(calculate_risk_scores(batch), 2))
+    queue.shutdown()
+
+
+def test_queued_job_cancellation_and_client_limit(tmp_path):
+    """Test that queued jobs can be cancelled and per-client limits apply."""
+    queue = JobQueue(MemoryJobStore(), str(tmp_path / "spool"), workers=1, max_active_per_client=1)
+    release = threading.Event()
+    queue._executor.submit(release.wait)  # occupy the only worker
+    
+    write_patients(tmp_path / "a.csv", 10)
+    write_patients(tmp_path / "b.csv", 10)
+    write_patients(tmp_path / "c.csv", 10)
+    job = queue.submit("client-a", str(tmp_path / "a.csv"))
+    with pytest.raises(JobLimitExceeded):
+        queue.submit("client-a", str(tmp_path / "b.csv"))
+    other = queue.submit("client-b", str(tmp_path / "c.csv"))
+    
+    assert queue.cancel(job.id).status == CANCELLED
+    release.set()
+    assert wait_for(queue, other.id).status == SUCCEEDED
+    assert queue.get(job.id).status == CANCELLED
+    assert queue.get(job.id).chunks == 0
+    queue.shutdown()
+
+
+def test_invalid_rows_fail_job(tmp_path):
+    """Test that invalid patient data fails the job with the row range."""
+    queue = JobQueue(MemoryJobStore(), str(tmp_path / "spool"), workers=1)
+    write_patients(tmp_path / "patients.csv", 20)
+    frame = pd.read_csv(tmp_path / "patients.csv")
+    frame.loc[15, "age"] = 150
+    frame.to_csv(tmp_path / "patients.csv", index=False)
+    
+    job = wait_for(queue, queue.submit("client-a", str(tmp_path / "patients.csv"), chunk_size=10).id)
+    assert job.status == FAILED
+    assert job.error.startswith("rows 10-19: row 5: age")
+    queue.shutdown()
+
+
+def test_jobs_endpoints(tmp_path):
+    """Test submit, poll, page and stream through the API."""
+    app.extensions["job_queue"] = JobQueue(MemoryJobStore(), str(tmp_path / "spool"), workers=1)
+    try:
+        client = app.test_client()
+        write_patients(tmp_path / "patients.csv", 30)
+        body = (tmp_path / "patients.csv").read_bytes()
+        
+        submitted = client.post("/api/jobs?chunk_size=20", data=body, content_type="text/csv")
+        assert submitted.status_code == 202
+        job_id = submitted.get_json()["id"]
+        assert wait_for(app.extensions["job_queue"], job_id).status == SUCCEEDED
+        
+        status = client.get(f"/api/jobs/{job_id}").get_json()
+        assert status["pages"] == 2 and status["progress"] == 1.0
+        page = client.get(f"/api/jobs/{job_id}/results?page=1").get_json()
+        assert len(page["rows"]) == 10
+        csv = client.get(f"/api/jobs/{job_id}/results?format=csv")
+        assert len(pd.read_csv(io.BytesIO(csv.data))) == 30
+        
+        assert client.get(f"/api/jobs/{job_id}/results?page=5").status_code == 404
+        assert client.get("/api/jobs/missing").status_code == 404
+    finally:
+        app.extensions.pop("job_queue").shutdown()
+
+
+def test_job_queue_created_once_under_concurrency(tmp_path, monkeypatch):
+    """Test that concurrent first requests share a single job queue."""
+    import app as app_module
+    
+    monkeypatch.setitem(app.config, "JOBS_DIR", str(tmp_path / "spool"))
+    monkeypatch.setitem(app.config, "JOBS_DB", None)
+    app.extensions.pop("job_queue", None)
+    barrier = threading.Barrier(8)
+    queues = []
+    
+    def first_request():
+        barrier.wait()
+        queues.append(app_module.get_job_queue())
+    
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert len({id(queue) for queue in queues}) == 1
+    finally:
+        app.extensions.pop("job_queue").shutdown()
+
+
+def test_orphaned_jobs_fail_on_startup(tmp_path):
+    """Test that jobs left active by a stopped queue are failed when a queue starts."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    store.heartbeat("live-worker")
+    common = dict(client_id="client-a", input_path="", input_format="csv", spool_dir=str(tmp_path),
+                  model_version="1.0.0", chunk_size=10)
+    store.create(Job(id="running", status=RUNNING, worker_id="dead-worker", **common))
+    store.create(Job(id="queued", status=QUEUED, **common))
+    store.create(Job(id="alive", status=RUNNING, worker_id="live-worker", **common))
+    assert store.active_count("client-a") == 3
+    
+    queue = JobQueue(SQLiteJobStore(str(tmp_path / "jobs.db")), str(tmp_path / "spool"))
+    try:
+        assert queue.get("running").status == FAILED
+        assert queue.get("queued").error == ORPHANED_ERROR
+        assert queue.get("alive").status == RUNNING
+        assert store.active_count("client-a") == 1
+    finally:
+        queue.shutdown()
+
+
+def test_finished_jobs_deleted_and_swept(tmp_path):
+    """Test deleting a finished job's results directly, through the API and by retention."""
+    queue = JobQueue(MemoryJobStore(), str(tmp_path / "spool"), workers=1, retention=3600)
+    app.extensions["job_queue"] = queue
+    try:
+        jobs = []
+        for name in ("a", "b", "c"):
+            write_patients(tmp_path / f"{name}.csv", 10)
+            jobs.append(wait_for(queue, queue.submit(name, str(tmp_path / f"{name}.csv")).id))
+        assert all(job.status == SUCCEEDED for job in jobs)
+        assert not os.path.exists(jobs[0].input_path)
+        
+        queue.delete(jobs[0].id)
+        assert queue.get(jobs[0].id) is None and not os.path.exists(jobs[0].spool_dir)
+        
+        client = app.test_client()
+        assert client.delete(f"/api/jobs/{jobs[1].id}").status_code == 204
+        assert client.delete(f"/api/jobs/{jobs[1].id}").status_code == 404
+        
+        assert queue.sweep() == []
+        queue.retention = 0
+        assert queue.sweep() == [jobs[2].id]
+        assert not os.path.exists(jobs[2].spool_dir)
+    finally:
+        app.extensions.pop("job_queue").shutdown()
+
+
+@pytest.mark.parametrize("column, value", [
+    ("family_history", ""),
+    ("hormone_use", "maybe"),
+    ("first_pregnancy_age", "twenty-eight"),
+])
+def test_bad_cells_fail_job_instead_of_being_coerced(tmp_path, column, value):
+    """Test that unparseable booleans and pregnancy ages are rejected."""
+    queue = JobQueue(MemoryJobStore(), str(tmp_path / "spool"), workers=1)
+    write_patients(tmp_path / "patients.csv", 4)
+    frame = pd.read_csv(tmp_path / "patients.csv", dtype=str, keep_default_na=False)
+    frame.loc[2, column] = value
+    frame.to_csv(tmp_path / "patients.csv", index=False)
+    
+    job = wait_for(queue, queue.submit("client-a", str(tmp_path / "patients.csv")).id)
+    assert job.status == FAILED
+    assert column in job.error
+    queue.shutdown()
+
+
+def test_batch_from_frame_accepts_blank_pregnancy_and_bool_spellings():
+    """Test the accepted boolean spellings and blank pregnancy ages."""
+    frame = pd.DataFrame({
+        "age": [45, 55, 60], "bmi": [24.0, 28.0, 31.0],
+        "family_history": ["yes", "No", "1"], "breast_density": ["low", "medium", "high"],
+        "menopausal_status": ["premenopausal", "postmenopausal", "postmenopausal"],
+        "hormone_use": [True, False, True], "previous_biopsies": [0, 1, 2],
+        "first_menstruation_age": [13, 11, 12], "first_pregnancy_age": [25, " ", None],
+    })
+    batch = batch_from_frame(frame)
+    assert list(batch.family_history) == [True, False, True]
+    assert batch.first_pregnancy_age[0] == 25 and np.isnan(batch.first_pregnancy_age[1:]).all()
+
+
+def test_cancel_during_last_chunk_is_not_overwritten(tmp_path, monkeypatch):
+    """Test that a cancel arriving while the final chunk is scored ends as cancelled."""
+    import jobs
+    
+    queue = JobQueue(MemoryJobStore(), str(tmp_path / "spool"), workers=1)
+    release = threading.Event()
+    queue._executor.submit(release.wait)  # hold the job in the queue until its id is known
+    job_ids = []
+    original = jobs.batch_metrics_to_frame
+    
+    def cancel_then_tabulate(metrics):
+        queue.cancel(job_ids[0])
+        return original(metrics)
+    
+    monkeypatch.setattr(jobs, "batch_metrics_to_frame", cancel_then_tabulate)
+    write_patients(tmp_path / "patients.csv", 10)
+    job_ids.append(queue.submit("client-a", str(tmp_path / "patients.csv")).id)
+    release.set()
+    
+    job = wait_for(queue, job_ids[0])
+    assert (job.status, job.cancel_requested) == (CANCELLED, True)
+    queue.shutdown()
+
+
+def test_client_limit_checked_before_upload_is_read(tmp_path):
+    """Test that an over-limit submission is refused without spooling its body."""
+    queue = JobQueue(MemoryJobStore(), str(tmp_path / "spool"), workers=1, max_active_per_client=1)
+    release = threading.Event()
+    queue._executor.submit(release.wait)
+    app.extensions["job_queue"] = queue
+    try:
+        client = app.test_client()
+        write_patients(tmp_path / "patients.csv", 10)
+        body = (tmp_path / "patients.csv").read_bytes()
+        headers = {"X-Client-Id": "client-a"}
+        assert client.post("/api/jobs", data=body, content_type="text/csv", headers=headers).status_code == 202
+        refused = client.post("/api/jobs", data=body, content_type="text/csv", headers=headers)
+        assert refused.status_code == 429
+        assert not [name for name in os.listdir(queue.spool_root) if name.endswith(".upload")]
+    finally:
+        release.set()
+        app.extensions.pop("job_queue").shutdown()
@@ -0,0 +1,160 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app import app
+from breast_cancer_model import PatientBatch, assess_breast_cancer_risk, calculate_risk_scores
+from metrics import compute_metrics
+from model_spec import DEFAULT_SPEC, ModelRegistry, ModelSpec, model_registry, with_overrides
+from presets import high_risk_profile, low_risk_profile, very_high_risk_profile
+from serialization import params_to_dict
+
+
+def test_default_spec_reproduces_original_model():
+    """Test that the built-in spec keeps the original coefficients."""
+    result = assess_breast_cancer_risk(high_risk_profile(), DEFAULT_SPEC)
+    assert result.risk_score == 49.5
+    assert result.risk_category == "very_high"
+    assert result.model_version == DEFAULT_SPEC.version
+    assert compute_metrics(result, high_risk_profile()).screening_frequency_months == 6
+
+
+def test_spec_validation():
+    """Test that inconsistent specs are rejected."""
+    with pytest.raises(ValueError):
+        ModelSpec(version="bad", category_cutoffs=(25.0, 15.0, 40.0))
+    with pytest.raises(ValueError):
+        ModelSpec(version="bad", density_factors={"low": 0.0})
+    with pytest.raises(ValueError):
+        ModelSpec(version="bad", percentile_values=(1.0, 2.0))
+    with pytest.raises(ValueError):
+        ModelSpec.from_dict({"version": "bad", "unknown_coefficient": 1.0})
+    with pytest.raises(ValueError):
+        ModelSpec.from_dict(DEFAULT_SPEC.to_dict() | {"version": ""})
+    for bad in [
+        {"low_screening_age_cutoffs": ["a", "b"]},
+        {"percentile_values": [20, 50, 75, 90, "98"]},
+        {"base_risk": True},
+        {"density_factors": {"low": False, "medium": 3.0, "high": 8.0, "very_high": 15.0}},
+        {"low_screening_months": [24, 18, True]},
+    ]:
+        with pytest.raises(ValueError):
+            ModelSpec.from_dict({"version": "bad", **bad})
+
+
+def test_unregistered_spec_must_be_passed_explicitly():
+    """Test metrics for a result scored by an unregistered spec."""
+    spec = with_overrides(DEFAULT_SPEC, "test-unregistered", base_risk=20.0)
+    params = high_risk_profile()
+    result = assess_breast_cancer_risk(params, spec)
+    with pytest.raises(ValueError, match="pass the spec"):
+        compute_metrics(result, params)
+    assert compute_metrics(result, params, spec).risk_score == result.risk_score
+
+
+def test_spec_mappings_are_read_only():
+    """Test that a spec's dict fields cannot be changed after construction."""
+    densities = dict(DEFAULT_SPEC.density_factors)
+    spec = ModelSpec(version="test-frozen", density_factors=densities)
+    densities["high"] = 99.0
+    assert spec.density_factors["high"] == 8.0
+    with pytest.raises(TypeError):
+        spec.density_factors["high"] = 99.0
+    with pytest.raises(TypeError):
+        spec.category_screening_months["high"] = 3
+    
+    data = json.loads(json.dumps(spec.to_dict()))
+    assert ModelSpec.from_dict(data) == spec
+    assert with_overrides(spec, "test-frozen-2").density_factors == spec.density_factors
+
+
+def test_custom_spec_changes_scalar_and_batch_scores():
+    """Test that scalar and vectorized scoring both follow the spec."""
+    spec = with_overrides(DEFAULT_SPEC, "test-custom", family_history_factor=30.0, category_cutoffs=(20.0, 30.0, 60.0))
+    profiles = [low_risk_profile(), high_risk_profile(), very_high_risk_profile()]
+    scalar = [assess_breast_cancer_risk(p, spec) for p in profiles]
+    assert scalar[1].risk_score == 64.5
+    assert np.allclose(calculate_risk_scores(PatientBatch.from_params(profiles), spec), [r.risk_score for r in scalar])
+    assert assess_breast_cancer_risk(low_risk_profile(), spec).risk_category == "low"
+
+
+def test_registry_versions_are_immutable_and_swappable():
+    """Test registering, activating and refusing to redefine versions."""
+    registry = ModelRegistry()
+    v2 = with_overrides(DEFAULT_SPEC, "2.0.0", base_risk=10.0)
+    registry.register(v2)
+    assert registry.active is DEFAULT_SPEC
+    registry.activate("2.0.0")
+    assert registry.active is v2
+    with pytest.raises(ValueError):
+        registry.register(with_overrides(DEFAULT_SPEC, "2.0.0", base_risk=11.0))
+    with pytest.raises(ValueError):
+        registry.activate("9.9.9")
+
+
+def test_registry_hot_reloads_spec_file(tmp_path):
+    """Test that file edits are picked up and bad files are ignored."""
+    path = tmp_path / "model.json"
+    path.write_text(json.dumps({"version": "file-1", "base_risk": 11.0}))
+    registry = ModelRegistry(reload_interval=0.0)
+    assert registry.watch_file(str(path)).version == "file-1"
+    
+    path.write_text(json.dumps({"active": "file-2", "models": [{"version": "file-2", "base_risk": 13.0}]}))
+    os.utime(path, (1, 1))
+    assert registry.maybe_reload()
+    assert registry.active.version == "file-2"
+    assert set(registry.versions()) == {DEFAULT_SPEC.version, "file-1", "file-2"}
+    
+    path.write_text("{not json")
+    os.utime(path, (2, 2))
+    assert not registry.maybe_reload()
+    assert registry.active.version == "file-2"
+
+
+def test_assess_endpoint_ab_comparison():
+    """Test A/B scoring against a second model version in one request."""
+    spec = with_overrides(DEFAULT_SPEC, "test-ab", hormone_factor=0.0)
+    model_registry.register(spec)
+    client = app.test_client()
+    payload = params_to_dict(very_high_risk_profile())
+    
+    data = client.post("/api/assess?compare_model=test-ab", json=payload).get_json()
+    assert data["model_version"] == DEFAULT_SPEC.version
+    assert data["comparison"]["model_version"] == "test-ab"
+    assert data["comparison"]["risk_score"] == pytest.approx(data["risk_score"] - 8.0)
+    
+    assert client.post("/api/assess?model=missing", json=payload).status_code == 400
+    for kind in ("risk_score", "factors", "timeline"):
+        assert client.post(f"/api/plot/{kind}?model=missing", json=payload).status_code == 400
+
+
+def test_admin_model_changes_write_through_to_spec_file(tmp_path, monkeypatch):
+    """Test that admin registration/activation is published via the watched file."""
+    path = tmp_path / "model.json"
+    path.write_text(json.dumps({"version": "file-base"}))
+    registry = ModelRegistry()
+    registry.watch_file(str(path))
+    other_worker = ModelRegistry(reload_interval=0.0)
+    other_worker.watch_file(str(path))
+    monkeypatch.setattr("app.model_registry", registry)
+    monkeypatch.setitem(app.config, "ADMIN_TOKEN", "secret")
+    client = app.test_client()
+    headers = {"X-Admin-Token": "secret"}
+    
+    spec = with_overrides(DEFAULT_SPEC, "file-next", base_risk=11.0).to_dict()
+    response = client.post("/api/admin/model?activate=1", json=spec, headers=headers)
+    assert response.get_json() == {"registered": "file-next", "active": "file-next"}
+    assert registry.active.version == "file-next"
+    
+    os.utime(path, ns=(0, 0))  # make the change visible even within mtime resolution
+    assert other_worker.maybe_reload()
+    assert other_worker.active.version == "file-next"
+    
+    assert client.post("/api/admin/model/activate/file-base", headers=headers).get_json() == {"active": "file-base"}
+    assert json.loads(path.read_text())["active"] == "file-base"
+    assert client.post("/api/admin/model/activate/missing", headers=headers).status_code == 404
+    
+    monkeypatch.setattr("app.model_registry", ModelRegistry())
+    assert client.post("/api/admin/model/activate/file-base", headers=headers).status_code == 409
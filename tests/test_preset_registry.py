@@ -0,0 +1,75 @@
+import gzip
+import json
+import threading
+
+from app import app
+from breast_cancer_model import assess_breast_cancer_risk
+from model_spec import DEFAULT_SPEC, model_registry, with_overrides
+from preset_registry import PRESET_FACTORIES, get_preset_registry, prepare_preset_registry
+
+
+def test_registry_matches_live_assessment():
+    """Test that precomputed preset assessments match a fresh computation."""
+    registry = get_preset_registry()
+    for name, factory in PRESET_FACTORIES.items():
+        entry = registry.entries[name]
+        result = assess_breast_cancer_risk(factory())
+        payload = json.loads(entry.assessment.body)
+        assert payload["risk_score"] == round(result.risk_score, 2)
+        assert payload["risk_category"] == result.risk_category
+        assert set(entry.plots) == {"risk_score", "factors", "timeline"}
+        assert all(plot.body.startswith(b"\x89PNG") for plot in entry.plots.values())
+
+
+def test_presets_endpoint_etag_and_gzip():
+    """Test that presets are served precompressed and revalidate with ETags."""
+    client = app.test_client()
+    response = client.get("/api/presets", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    data = json.loads(gzip.decompress(response.data))
+    assert set(data["presets"]) == set(PRESET_FACTORIES)
+    
+    etag = response.headers["ETag"]
+    cached = client.get("/api/presets", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+
+
+def test_fingerprinted_asset_is_immutable():
+    """Test that asset URLs listed in the index are served as immutable."""
+    client = app.test_client()
+    index = json.loads(client.get("/api/presets").data)
+    url = index["assets"]["high_risk"]["plot_factors"]
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == "image/png"
+    assert "immutable" in response.headers["Cache-Control"]
+    
+    assert client.get("/api/presets/high_risk/plot/unknown").status_code == 404
+
+
+def test_activation_builds_presets_in_background(monkeypatch):
+    """Test that a newly activated version is prebuilt while the old one is served."""
+    import preset_registry
+    
+    served = get_preset_registry()
+    original = model_registry.active
+    release = threading.Event()
+    build = preset_registry.build_preset_registry
+    
+    def slow_build(spec):
+        assert release.wait(timeout=30)
+        return build(spec)
+    
+    monkeypatch.setattr(preset_registry, "build_preset_registry", slow_build)
+    spec = with_overrides(DEFAULT_SPEC, "test-preset-swap", base_risk=11.0)
+    try:
+        model_registry.register(spec, activate=True)
+        assert get_preset_registry() is served  # not blocked behind the build
+        release.set()
+        prepare_preset_registry(spec).result(timeout=30)
+        assert get_preset_registry().model_version == "test-preset-swap"
+    finally:
+        release.set()
+        model_registry.activate(original.version)
+    assert get_preset_registry() is served
@@ -0,0 +1,87 @@
+import pstats
+
+import pytest
+
+from app import app
+from profiling import ProfileRecord, ProfileStore
+
+
+@pytest.fixture
+def profiling_client():
+    app.config["PROFILING_ENABLED"] = True
+    app.config["ADMIN_TOKEN"] = "test-token"
+    client = app.test_client()
+    client.environ_base["HTTP_X_ADMIN_TOKEN"] = "test-token"
+    try:
+        yield client
+    finally:
+        app.config["PROFILING_ENABLED"] = False
+        app.config["ADMIN_TOKEN"] = None
+
+
+def test_header_ignored_when_profiling_disabled():
+    """Test that the X-Profile header does nothing unless profiling is enabled."""
+    response = app.test_client().get("/api/health", headers={"X-Profile": "1"})
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_header_needs_admin_credentials(profiling_client):
+    """Test that anonymous callers cannot trigger profiling with the header."""
+    anonymous = app.test_client()
+    response = anonymous.get("/api/health", headers={"X-Profile": "cprofile"})
+    assert "X-Profile-Id" not in response.headers
+    response = profiling_client.get("/api/health", headers={"X-Profile": "cprofile"})
+    assert "X-Profile-Id" in response.headers
+
+
+def test_admin_endpoints_need_token_or_localhost_opt_in(monkeypatch):
+    """Test that admin endpoints are closed when no token is configured."""
+    monkeypatch.setitem(app.config, "ADMIN_TOKEN", None)
+    client = app.test_client()
+    assert client.get("/api/admin/profiles").status_code == 403
+    
+    monkeypatch.setitem(app.config, "ADMIN_ALLOW_LOCALHOST", True)
+    assert client.get("/api/admin/profiles").status_code == 200
+    
+    monkeypatch.setitem(app.config, "ADMIN_TOKEN", "secret")
+    assert client.get("/api/admin/profiles").status_code == 403
+    assert client.get("/api/admin/profiles", headers={"X-Admin-Token": "secret"}).status_code == 200
+
+
+def test_sampled_profile_exports_folded_stacks(profiling_client):
+    """Test that a sampled request profile is listed and exported as folded stacks."""
+    response = profiling_client.get("/api/presets", headers={"X-Profile": "sample"})
+    profile_id = response.headers["X-Profile-Id"]
+    
+    listed = profiling_client.get("/api/admin/profiles").get_json()["profiles"]
+    assert listed[0]["id"] == profile_id
+    assert listed[0]["path"] == "/api/presets"
+    
+    folded = profiling_client.get(f"/api/admin/profiles/{profile_id}").data.decode()
+    for line in folded.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and stack
+
+
+def test_cprofile_exports_loadable_pstats(profiling_client, tmp_path):
+    """Test that cProfile captures load with the standard pstats module."""
+    response = profiling_client.get("/api/health", headers={"X-Profile": "cprofile"})
+    profile_id = response.headers["X-Profile-Id"]
+    
+    dump = profiling_client.get(f"/api/admin/profiles/{profile_id}?format=pstats")
+    path = tmp_path / "profile.prof"
+    path.write_bytes(dump.data)
+    stats = pstats.Stats(str(path))
+    assert any(func[2] == "health_check" for func in stats.stats)
+    
+    assert profiling_client.get(f"/api/admin/profiles/{profile_id}?format=folded").status_code == 400
+
+
+def test_profile_store_is_bounded():
+    """Test that the ring buffer keeps only the newest profiles."""
+    store = ProfileStore(size=2)
+    for i in range(3):
+        store.add(ProfileRecord(id=str(i), mode="sample", method="GET", path="/", status=200,
+                                started_at=0.0, duration=0.0))
+    assert [record.id for record in store.list()] == ["2", "1"]
+    assert store.get("0") is None
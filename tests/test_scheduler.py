@@ -0,0 +1,57 @@
+import numpy as np
+
+from breast_cancer_model import calculate_risk_scores
+from metrics import compute_metrics_batch
+from scheduler import ScreeningSchedule, add_months, next_due_dates, plan_screenings, plan_screenings_for_batch
+from synthetic import generate_patients
+
+
+def test_add_months_clips_to_month_end():
+    """Test calendar month arithmetic, including short months and leap years."""
+    dates = np.array(["2024-01-31", "2023-01-31", "2024-08-31", "2024-12-15"], dtype="datetime64[D]")
+    result = add_months(dates, np.array([1, 1, 6, 18]))
+    expected = np.array(["2024-02-29", "2023-02-28", "2025-02-28", "2026-06-15"], dtype="datetime64[D]")
+    assert np.array_equal(result, expected)
+
+
+def test_never_screened_patients_are_due_today():
+    """Test that patients without a last screening are due immediately."""
+    last = np.array(["2026-01-10", "NaT"], dtype="datetime64[D]")
+    due = next_due_dates(last, np.array([12, 6]), today="2026-10-19")
+    assert np.array_equal(due, np.array(["2027-01-10", "2026-10-19"], dtype="datetime64[D]"))
+
+
+def test_schedule_queries_match_linear_scan():
+    """Test indexed range queries against a brute-force scan."""
+    rng = np.random.default_rng(0)
+    n = 5_000
+    batch = generate_patients(n, seed=4)
+    last = np.datetime64("2026-10-19") - rng.integers(0, 900, n).astype("timedelta64[D]")
+    ids = np.arange(n) + 1000
+    schedule = plan_screenings_for_batch(ids, batch, last, today="2026-10-19")
+    
+    # Rebuild due dates by brute force in registry order
+    metrics = compute_metrics_batch(calculate_risk_scores(batch), batch.age)
+    due = add_months(last, metrics.screening_frequency_months)
+    
+    today = np.datetime64("2026-10-19")
+    soon = (due >= today) & (due < today + 30)
+    assert set(schedule.due_within(30, today)) == set(ids[soon])
+    assert set(schedule.overdue(today)) == set(ids[due < today])
+    assert schedule.count_between("2027-01-01", "2027-02-01") == int(
+        ((due >= np.datetime64("2027-01-01")) & (due < np.datetime64("2027-02-01"))).sum()
+    )
+    
+    months, counts = schedule.monthly_capacity("2026-10-19", 24)
+    assert months[0] == np.datetime64("2026-10-01")
+    assert counts.sum() == (due < np.datetime64("2028-10-01")).sum()
+
+
+def test_plan_screenings_uses_metrics_intervals():
+    """Test that schedules follow the metrics' screening intervals."""
+    metrics = compute_metrics_batch(np.array([50.0, 10.0]), np.array([55.0, 35.0]))
+    last = np.array(["2026-01-01", "2026-01-01"], dtype="datetime64[D]")
+    schedule = plan_screenings(np.array(["a", "b"]), last, metrics)
+    assert isinstance(schedule, ScreeningSchedule)
+    assert list(schedule.patient_ids) == ["a", "b"]
+    assert list(schedule.due_dates) == [np.datetime64("2026-07-01"), np.datetime64("2028-01-01")]
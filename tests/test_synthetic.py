@@ -0,0 +1,52 @@
+import numpy as np
+
+from breast_cancer_model import calculate_risk_scores, validate_batch
+from loadtest import FlaskClientTransport, parse_mix, run_load_test
+from synthetic import generate_patients, iter_patient_chunks
+
+
+def test_generator_is_reproducible_and_valid():
+    """Test that the same seed yields the same valid population."""
+    a = generate_patients(10_000, seed=7)
+    b = generate_patients(10_000, seed=7)
+    validate_batch(a)
+    assert np.array_equal(a.age, b.age)
+    assert np.array_equal(a.first_pregnancy_age, b.first_pregnancy_age, equal_nan=True)
+    assert not np.array_equal(a.bmi, generate_patients(10_000, seed=8).bmi)
+    
+    scores = calculate_risk_scores(a)
+    assert ((scores >= 0) & (scores <= 100)).all()
+
+
+def test_generator_distributions_are_plausible():
+    """Test coarse properties of the synthetic distributions."""
+    batch = generate_patients(50_000, seed=1)
+    assert 45 < batch.age.mean() < 60
+    # Postmenopausal status should track age
+    assert batch.menopausal_status[batch.age >= 60].mean() > 0.9
+    assert batch.menopausal_status[batch.age < 40].mean() < 0.1
+    assert 0.1 < np.isnan(batch.first_pregnancy_age).mean() < 0.3
+    pregnant = ~np.isnan(batch.first_pregnancy_age)
+    assert (batch.first_pregnancy_age[pregnant] >= batch.first_menstruation_age[pregnant]).all()
+
+
+def test_chunked_stream_covers_total():
+    """Test that chunked generation yields exactly n rows."""
+    sizes = [len(chunk) for chunk in iter_patient_chunks(2_500, chunk_size=1_000, seed=3)]
+    assert sizes == [1_000, 1_000, 500]
+
+
+def test_load_test_against_test_client():
+    """Test a small offline load run end to end."""
+    report = run_load_test(
+        FlaskClientTransport(),
+        rate=500.0,
+        total=30,
+        mix=parse_mix("assess=0.8,preset=0.2"),
+        concurrency=2,
+        seed=0,
+    )
+    assert report.errors == 0
+    assert len(report.latencies) == 30
+    assert sum(count for _, count in report.histogram()) == 30
+    assert "throughput" in report.format()